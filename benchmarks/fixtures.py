@@ -0,0 +1,87 @@
+"""
+Fixture generation for the vdx benchmarks: synthetic vaults served by the
+offline simulator at a given scale, and deterministic edits to a pulled
+project tree so push, package and patch have realistic work to do.
+"""
+import os
+import random
+
+from vdx.simulator import generate_vault
+
+DEFAULT_SCALES = (1000, 10000, 50000)
+DEFAULT_PAGES = 3
+DEFAULT_PAGE_MB = 4.0
+# Fraction of pulled MDL files edited before the push/package/patch phases
+DEFAULT_CHANGE_FRACTION = 0.01
+
+def java_classes_for(scale):
+    """Java class count that grows with the vault: one per 100 components, at least 10."""
+    return max(10, scale // 100)
+
+def build_vault(scale, pages=DEFAULT_PAGES, page_mb=DEFAULT_PAGE_MB, seed=0):
+    """Returns a SyntheticVault with `scale` MDL components plus Java classes and multi-MB distributions."""
+    return generate_vault(
+        components=scale,
+        java_classes=java_classes_for(scale),
+        pages=pages,
+        page_bytes=int(page_mb * 1024 * 1024),
+        page_files=8,
+        seed=seed,
+    )
+
+def _tracked_files(root, top):
+    found = []
+    for dirpath, _, files in os.walk(os.path.join(root, top)):
+        found.extend(os.path.join(dirpath, f) for f in files)
+    return sorted(found)
+
+def mutate_project(root, fraction=DEFAULT_CHANGE_FRACTION, seed=0):
+    """
+    Edits a pulled project in place: changes `fraction` of the MDL files (at least
+    one), adds a new component that references an existing one, deletes one
+    component, and touches one Java class and one page file.
+    Returns counts of what was changed.
+    """
+    rng = random.Random(seed)
+    mdl_files = _tracked_files(root, "components")
+    changed = rng.sample(mdl_files, max(1, int(len(mdl_files) * fraction))) if mdl_files else []
+    for path in changed:
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(f"\n/* benchmark edit {rng.random():.6f} */\n")
+
+    added = 0
+    picklists = [p for p in mdl_files if os.sep + "Picklist" + os.sep in p]
+    if picklists:
+        target = os.path.splitext(os.path.basename(picklists[0]))[0]
+        new_path = os.path.join(root, "components", "Object", "benchmark_added__c.mdl")
+        os.makedirs(os.path.dirname(new_path), exist_ok=True)
+        with open(new_path, 'w', encoding='utf-8') as f:
+            f.write(
+                "RECREATE Object benchmark_added__c (\n   label('Benchmark'),\n"
+                f"   Field status__c(type('Picklist'), picklist('Picklist.{target}'))\n);"
+            )
+        added = 1
+
+    deleted = 0
+    remaining = [p for p in mdl_files if p not in changed]
+    if remaining:
+        os.remove(remaining[-1])
+        deleted = 1
+
+    java_files = _tracked_files(root, "javasdk")
+    if java_files:
+        with open(java_files[0], 'a', encoding='utf-8') as f:
+            f.write("\n// benchmark edit\n")
+
+    page_files = [p for p in _tracked_files(root, "custom_pages") if p.endswith(".js")]
+    if page_files:
+        with open(page_files[0], 'ab') as f:
+            f.write(b"\n// benchmark edit\n")
+
+    return {
+        "mdl_changed": len(changed),
+        "mdl_added": added,
+        "mdl_deleted": deleted,
+        "java_changed": min(1, len(java_files)),
+        "page_files_changed": min(1, len(page_files)),
+    }
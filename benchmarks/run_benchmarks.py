@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Benchmarks vdx against the offline Vault simulator at several vault sizes.
+
+For every scale a synthetic vault is generated and served in-process, and each
+command runs as its own `vdx` subprocess in a scratch project: a cold pull, an
+incremental pull, then (after editing the tree) push --dry-run, patch and
+package. Wall time, peak RSS, exit code, request counts per endpoint and bytes
+moved are recorded per phase and written to a JSON file:
+
+    python benchmarks/run_benchmarks.py --scales 1000,10000 --output results.json
+    python benchmarks/run_benchmarks.py --compare results.json
+"""
+import os
+import sys
+import json
+import time
+import shutil
+import logging
+import argparse
+import platform
+import tempfile
+import subprocess
+from datetime import datetime, timezone
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+VDX_PROJECT = os.path.join(REPO_ROOT, "vdx_project")
+VDX_MAIN = os.path.join(VDX_PROJECT, "main.py")
+sys.path.insert(0, VDX_PROJECT)
+
+from vdx.simulator import VaultSimulator  # noqa: E402
+from fixtures import (  # noqa: E402
+    DEFAULT_SCALES, DEFAULT_PAGES, DEFAULT_PAGE_MB, DEFAULT_CHANGE_FRACTION,
+    build_vault, java_classes_for, mutate_project,
+)
+
+# (phase name, vdx arguments); "mutate" edits the tree instead of running vdx
+PHASES = [
+    ("pull", ["pull"]),
+    ("pull_incremental", ["pull", "--incremental"]),
+    ("mutate", None),
+    ("push_dry_run", ["push", "--dry-run"]),
+    ("patch", ["patch"]),
+    ("package", ["package"]),
+]
+
+def _git_revision():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "HEAD"], cwd=REPO_ROOT, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+            universal_newlines=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# Runs vdx as the only child of a fresh interpreter, so RUSAGE_CHILDREN.ru_maxrss
+# (a high-water mark over all waited-for children) is the peak of that one command
+_MEASURE_SCRIPT = """
+import sys, time, resource, subprocess
+start = time.perf_counter()
+code = subprocess.call(sys.argv[2:])
+with open(sys.argv[1], 'w') as f:
+    f.write(f"{time.perf_counter() - start} {resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss}")
+sys.exit(code)
+"""
+
+def _run_vdx(argv, project_dir, env, log_path):
+    """Runs one vdx command. Returns (exit_code, wall_seconds, peak_rss_mb); peak RSS is None where unsupported."""
+    command = [sys.executable, VDX_MAIN] + argv
+    with open(log_path, 'w') as log:
+        if resource is None:
+            start = time.perf_counter()
+            result = subprocess.run(command, cwd=project_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+            return result.returncode, time.perf_counter() - start, None
+
+        usage_path = log_path + ".usage"
+        result = subprocess.run([sys.executable, "-c", _MEASURE_SCRIPT, usage_path] + command,
+                                cwd=project_dir, env=env, stdout=log, stderr=subprocess.STDOUT)
+    with open(usage_path, 'r') as f:
+        wall, maxrss = f.read().split()
+    os.remove(usage_path)
+    # ru_maxrss is reported in KiB on Linux and in bytes on macOS
+    divisor = 1024 * 1024 if sys.platform == "darwin" else 1024
+    return result.returncode, float(wall), int(maxrss) / divisor
+
+def benchmark_scale(scale, args, work_root):
+    logging.info(f"== {scale} components: generating vault...")
+    vault = build_vault(scale, pages=args.pages, page_mb=args.page_mb, seed=args.seed)
+    project_dir = os.path.join(work_root, f"project_{scale}")
+    os.makedirs(project_dir)
+
+    latency = {"*": args.latency} if args.latency else None
+    results = []
+    with VaultSimulator(vault, latency=latency, seed=args.seed) as server:
+        env = dict(os.environ, PYTHONPATH=VDX_PROJECT + os.pathsep + os.environ.get("PYTHONPATH", ""))
+        env.pop("VAULT_DNS", None)
+        env.pop("VAULT_USERNAME", None)
+        env.pop("VAULT_PASSWORD", None)
+        code, _, _ = _run_vdx(["login", "-v", server.url, "-u", "bench", "-p", "bench"], project_dir, env,
+                              os.path.join(work_root, f"{scale}_login.log"))
+        if code != 0:
+            raise RuntimeError(f"Login against the simulator failed; see {work_root}/{scale}_login.log")
+
+        for phase, argv in PHASES:
+            if argv is None:
+                changes = mutate_project(project_dir, fraction=args.change_fraction, seed=args.seed)
+                logging.info(f"   {phase:<17} {changes}")
+                continue
+
+            if args.jobs and argv[0] in ("pull", "push"):
+                argv = argv + ["--jobs", str(args.jobs)]
+            server.reset_stats()
+            log_path = os.path.join(work_root, f"{scale}_{phase}.log")
+            code, wall, rss = _run_vdx(argv, project_dir, env, log_path)
+            stats = server.stats
+            result = {
+                "scale": scale,
+                "phase": phase,
+                "command": "vdx " + " ".join(argv),
+                "exit_code": code,
+                "wall_seconds": round(wall, 3),
+                "peak_rss_mb": round(rss, 1) if rss is not None else None,
+                "request_count": sum(stats["requests"].values()),
+                "requests": dict(sorted(stats["requests"].items())),
+                "bytes_uploaded": stats["bytes_in"],
+                "bytes_downloaded": stats["bytes_out"],
+            }
+            results.append(result)
+            rss_text = "n/a" if rss is None else f"{rss:.1f}"
+            logging.info(
+                f"   {phase:<17} {wall:8.2f}s  {rss_text:>7} MB  {result['request_count']:6d} req  "
+                f"{stats['bytes_out'] / 1e6:8.1f} MB down  {stats['bytes_in'] / 1e6:7.1f} MB up"
+                + ("" if code == 0 else f"  exit {code} (see {log_path})")
+            )
+    return {
+        "scale": scale,
+        "components": len(vault.components) - len(vault.java_classes),
+        "java_classes": java_classes_for(scale),
+        "pages": args.pages,
+        "page_mb": args.page_mb,
+        "phases": results,
+    }
+
+def compare(baseline_path, current):
+    """Prints wall time and request count changes against a previous results file."""
+    with open(baseline_path, 'r') as f:
+        baseline = json.load(f)
+    previous = {(r["scale"], r["phase"]): r for run in baseline["runs"] for r in run["phases"]}
+    print(f"Compared with {baseline_path} ({baseline.get('git_revision') or 'unknown revision'}):")
+    print(f"{'scale':>7} {'phase':<17} {'wall (s)':>17} {'change':>8} {'requests':>15}")
+    for run in current["runs"]:
+        for r in run["phases"]:
+            old = previous.get((r["scale"], r["phase"]))
+            if not old:
+                continue
+            change = (r["wall_seconds"] - old["wall_seconds"]) / old["wall_seconds"] * 100 if old["wall_seconds"] else 0.0
+            print(
+                f"{r['scale']:>7} {r['phase']:<17} {old['wall_seconds']:>8.2f}->{r['wall_seconds']:<8.2f}"
+                f"{change:>+7.1f}% {old['request_count']:>7}->{r['request_count']:<7}"
+            )
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark vdx commands against the offline Vault simulator")
+    parser.add_argument("--scales", default=",".join(str(s) for s in DEFAULT_SCALES), help="Comma-separated component counts")
+    parser.add_argument("--pages", type=int, default=DEFAULT_PAGES, help="Custom Page distributions per vault")
+    parser.add_argument("--page-mb", type=float, default=DEFAULT_PAGE_MB, help="Approximate size of each distribution in MB")
+    parser.add_argument("--change-fraction", type=float, default=DEFAULT_CHANGE_FRACTION, help="Fraction of MDL files edited before push/patch/package")
+    parser.add_argument("--jobs", type=int, help="--jobs passed to pull and push (vdx default when omitted)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Simulated latency in seconds added to every API call")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", default=None, help="Results file (default benchmarks/results/<timestamp>.json)")
+    parser.add_argument("--work-dir", help="Where scratch projects are created (default: a temp dir)")
+    parser.add_argument("--keep", action="store_true", help="Keep scratch projects and per-phase logs")
+    parser.add_argument("--compare", metavar="BASELINE", help="Print changes relative to a previous results file")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    scales = [int(s) for s in args.scales.split(",") if s.strip()]
+    started = datetime.now(timezone.utc)
+    work_root = tempfile.mkdtemp(prefix="vdx-bench-", dir=args.work_dir)
+
+    report = {
+        "started_at": started.isoformat(),
+        "git_revision": _git_revision(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "settings": {k: v for k, v in vars(args).items() if k not in ("output", "work_dir", "keep", "compare")},
+        "runs": [],
+    }
+    try:
+        for scale in scales:
+            report["runs"].append(benchmark_scale(scale, args, work_root))
+    finally:
+        if args.keep:
+            logging.info(f"Scratch projects and logs kept in {work_root}")
+        else:
+            shutil.rmtree(work_root, ignore_errors=True)
+
+    output = args.output or os.path.join(REPO_ROOT, "benchmarks", "results", f"{started.strftime('%Y%m%dT%H%M%SZ')}.json")
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w') as f:
+        json.dump(report, f, indent=2)
+    logging.info(f"Results written to {output}")
+
+    if args.compare:
+        compare(args.compare, report)
+
+if __name__ == "__main__":
+    main()
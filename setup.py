@@ -12,6 +12,7 @@ setup(
     entry_points={
         "console_scripts": [
             "vdx=vdx.cli:main",
+            "vdx-simulator=vdx.simulator:main",
         ],
     },
 )
\ No newline at end of file
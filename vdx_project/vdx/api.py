@@ -1,16 +1,182 @@
-import requests
+import os
+import time
+import random
 import logging
+import re
 import json
-from vdx.auth import get_config, login, API_VERSION, CLIENT_ID
+from email.utils import parsedate_to_datetime
+from urllib.parse import urlsplit
+import requests
+from urllib3.exceptions import ConnectTimeoutError
+from vdx import transport, ratelimit, profiler, metrics
+from vdx.auth import get_config, renew_session, ensure_fresh_session, vault_base_url, API_VERSION, CLIENT_ID
+
+DEFAULT_MAX_RETRIES = 5
+DEFAULT_RETRY_BACKOFF = 1.0
+MAX_RETRY_DELAY = 60.0
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+# Methods that are safe to repeat after the server may already have acted on them
+IDEMPOTENT_METHODS = ("GET", "HEAD", "PUT", "DELETE", "OPTIONS")
+# Statuses meaning the request was refused before processing, so even a POST can be re-sent
+UNPROCESSED_STATUSES = (429, 503)
+
+def _max_retries():
+    return max(0, int(os.getenv("VDX_MAX_RETRIES", DEFAULT_MAX_RETRIES)))
+
+def _retry_after(response):
+    """Seconds requested by a Retry-After header (delta-seconds or HTTP-date), or None."""
+    value = response.headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+def _backoff_delay(attempt, retry_after=None):
+    """Full-jitter exponential backoff, never shorter than what the server asked for."""
+    base = float(os.getenv("VDX_RETRY_BACKOFF", DEFAULT_RETRY_BACKOFF))
+    delay = random.uniform(0, min(MAX_RETRY_DELAY, base * (2 ** attempt)))
+    if retry_after is not None:
+        delay = max(delay, min(retry_after, MAX_RETRY_DELAY))
+    return delay
+
+def _body_positions(kwargs):
+    """Remembers where every file-like request body starts so a retry can resend it."""
+    bodies = []
+    data = kwargs.get('data')
+    if hasattr(data, 'seek'):
+        bodies.append(data)
+    files = kwargs.get('files') or {}
+    for value in (files.values() if isinstance(files, dict) else (v for _, v in files)):
+        fileobj = value[1] if isinstance(value, (tuple, list)) else value
+        if hasattr(fileobj, 'seek'):
+            bodies.append(fileobj)
+    return [(body, body.tell()) for body in bodies]
+
+def _rewind(positions):
+    for body, position in positions:
+        body.seek(position)
+
+def _request_not_sent(error):
+    """True if the connection failed before any of the request reached the server."""
+    if isinstance(error, requests.exceptions.ConnectTimeout):
+        return True
+    if not isinstance(error, requests.exceptions.ConnectionError):
+        return False
+    reason = error.args[0] if error.args else None
+    # requests wraps urllib3's MaxRetryError, whose reason is the underlying failure
+    reason = getattr(reason, "reason", reason)
+    return isinstance(reason, ConnectTimeoutError)  # also covers NewConnectionError
+
+def _send(method, url, headers, kwargs, positions):
+    """
+    Sends one logical request, retrying 429/5xx responses and connection errors
+    with jittered exponential backoff. Non-idempotent methods (POST: MDL execute,
+    job starts, imports, uploads) are only retried when Vault refused the request
+    (429/503) or it never left this machine, so nothing is ever run twice.
+    Every attempt first takes a token from the shared rate limiter and rewinds
+    file bodies. Returns (response, retries) for the last attempt.
+    """
+    max_retries = _max_retries()
+    idempotent = method.upper() in IDEMPOTENT_METHODS
+    retry_statuses = RETRY_STATUSES if idempotent else UNPROCESSED_STATUSES
+    attempt = 0
+    while True:
+        ratelimit.acquire()
+        _rewind(positions)
+        try:
+            response = transport.request(method, url, headers=headers, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+            if attempt >= max_retries or not (idempotent or _request_not_sent(e)):
+                raise
+            delay = _backoff_delay(attempt)
+            logging.warning(f"[API] {method} {url} failed ({e.__class__.__name__}); retrying in {delay:.1f}s ({attempt + 1}/{max_retries})...")
+        else:
+            ratelimit.update(response.headers, response.status_code)
+            if response.status_code not in retry_statuses or attempt >= max_retries:
+                return response, attempt
+            delay = _backoff_delay(attempt, _retry_after(response))
+            logging.warning(f"[API] HTTP {response.status_code} on {method} {url}; retrying in {delay:.1f}s ({attempt + 1}/{max_retries})...")
+            response.close()
+        time.sleep(delay)
+        attempt += 1
+
+# Dynamic path segments are collapsed so requests can be grouped per endpoint
+_ENDPOINT_TEMPLATES = [
+    (re.compile(r"^/api/v[^/]+"), "/api/{version}"),
+    (re.compile(r"/code/[^/]+$"), "/code/{class}"),
+    (re.compile(r"/uicode/distributions/[^/]+"), "/uicode/distributions/{name}"),
+    (re.compile(r"/messages/(?!actions/)[^/]+/language/[^/]+"), "/messages/{type}/language/{lang}"),
+    (re.compile(r"/services/jobs/[^/]+"), "/services/jobs/{job_id}"),
+    (re.compile(r"/vpackages/[^/]+"), "/vpackages/{package_id}"),
+    (re.compile(r"/query/(?!components$).+$"), "/query/{next_page}"),
+]
+
+def endpoint_template(url):
+    """Returns the path of `url` with IDs and names replaced by placeholders, e.g. /api/{version}/code/{class}."""
+    path = urlsplit(url).path
+    for pattern, replacement in _ENDPOINT_TEMPLATES:
+        path = pattern.sub(replacement, path)
+    return path
+
+def _content_length(headers):
+    try:
+        return int(headers.get("Content-Length"))
+    except (TypeError, ValueError):
+        return None
+
+def _record_request(method, url, started, span_start, response, retries, renewed, streamed):
+    """
+    Feeds one finished API call into the run metrics and, when profiling, the trace.
+    Bodies of streamed responses are not read yet, so their bytes are counted by
+    the caller that consumes the stream.
+    """
+    status = response.status_code if response is not None else "error"
+    bytes_sent = bytes_received = None
+    if response is not None:
+        request = getattr(response, "request", None)
+        if request is not None:
+            bytes_sent = _content_length(request.headers) or 0
+        bytes_received = _content_length(response.headers)
+        if bytes_received is None and getattr(response, "_content_consumed", False):
+            bytes_received = len(response.content or b"")
+    template = endpoint_template(url)
+
+    metrics.inc("vdx_api_requests_total", endpoint=template, method=method, status=status)
+    metrics.observe("vdx_api_request_duration_seconds", time.perf_counter() - started, endpoint=template, method=method)
+    metrics.inc("vdx_api_bytes_sent_total", bytes_sent or 0)
+    if not streamed:
+        metrics.inc("vdx_api_bytes_received_total", bytes_received or 0)
+    if retries:
+        metrics.inc("vdx_api_retries_total", retries, endpoint=template)
+
+    if span_start is not None:
+        profiler.add_span(
+            f"{method} {template}", "api", span_start, profiler.timestamp_us() - span_start,
+            method=method, endpoint=template, status=status, bytes_sent=bytes_sent,
+            bytes_received=bytes_received, retries=retries, session_renewed=renewed,
+        )
+
+def _can_inspect_body(response, streamed):
+    """
+    Streamed downloads (e.g. zip archives) must not have their body read here;
+    only inspect them when Vault answered with a JSON error payload instead.
+    """
+    return not streamed or "application/json" in response.headers.get("Content-Type", "")
 
 def make_vault_request(method, endpoint, **kwargs):
-    config = get_config()
+    config = ensure_fresh_session(get_config())
     
     # Check if a full URL was passed (like next_page URLs)
     if endpoint.startswith("http"):
         url = endpoint
     else:
-        url = f"https://{config['vault_dns']}{endpoint}"
+        url = f"{vault_base_url(config['vault_dns'])}{endpoint}"
     
     headers = kwargs.pop('headers', {})
     headers["Authorization"] = config.get("session_id", "")
@@ -24,26 +190,44 @@ def make_vault_request(method, endpoint, **kwargs):
             data_str = data_str[:200] + " ... [TRUNCATED]"
         logging.debug(f"[API] Payload Preview: {data_str}")
         
-    response = requests.request(method, url, headers=headers, **kwargs)
-    logging.debug(f"[API] Response Status: {response.status_code}")
-    
-    # Vault sometimes returns HTTP 200 with FAILURE and INVALID_SESSION_ID in the body
-    if response.status_code == 401 or "INVALID_SESSION_ID" in response.text:
-        logging.info("Session expired. Automatically generating new session ID...")
-        config = login(silent=True)
-        headers["Authorization"] = config["session_id"]
-        response = requests.request(method, url, headers=headers, **kwargs)
-        logging.debug(f"[API] Retry Response Status: {response.status_code}")
+    positions = _body_positions(kwargs)
+    started = time.perf_counter()
+    span_start = profiler.timestamp_us() if profiler.is_enabled() else None
+    response, retries, renewed = None, 0, False
+    try:
+        response, retries = _send(method, url, headers, kwargs, positions)
+        logging.debug(f"[API] Response Status: {response.status_code}")
+
+        streamed = kwargs.get('stream', False)
+        inspect_body = _can_inspect_body(response, streamed)
+
+        # Vault sometimes returns HTTP 200 with FAILURE and INVALID_SESSION_ID in the body
+        if response.status_code == 401 or (inspect_body and "INVALID_SESSION_ID" in response.text):
+            logging.info("Session expired. Automatically generating new session ID...")
+            config = renew_session(headers["Authorization"])
+            headers["Authorization"] = config["session_id"]
+            renewed = True
+            response.close()
+            response = None
+            response, more_retries = _send(method, url, headers, kwargs, positions)
+            retries += more_retries
+            logging.debug(f"[API] Retry Response Status: {response.status_code}")
+            inspect_body = _can_inspect_body(response, streamed)
+    finally:
+        _record_request(method, url, started, span_start, response, retries, renewed, kwargs.get('stream', False))
         
     # Standardize error reporting at the API level (enforce responseStatus checking)
-    try:
-        resp_json = response.json()
-        response_status = resp_json.get("responseStatus")
-    except json.JSONDecodeError:
-        response_status = None
+    response_status = None
+    if inspect_body:
+        try:
+            resp_json = response.json()
+            response_status = resp_json.get("responseStatus")
+        except json.JSONDecodeError:
+            pass
 
     if response.status_code >= 400 or response_status == "FAILURE":
         logging.error(f"[API ERROR] HTTP {response.status_code} on {method} {url}. Use --verbose for full response.")
-        logging.debug(f"[API DEBUG] Full Response Body:\n{response.text}")
+        if inspect_body:
+            logging.debug(f"[API DEBUG] Full Response Body:\n{response.text}")
         
     return response
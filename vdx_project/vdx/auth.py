@@ -1,14 +1,26 @@
 import os
 import json
-import requests
 import sys
+import time
 import logging
+import threading
 from getpass import getpass
+from vdx import transport, metrics
 
 CONFIG_FILE = ".vdx_config"
 API_VERSION = "v26.1"
 CLIENT_ID = "veeva-vault-vdx-client"
 
+# In-process copy of .vdx_config. It is loaded once and replaced wholesale
+# (never mutated) so concurrent callers always see a consistent snapshot.
+_config = None
+_config_lock = threading.Lock()
+# Serialises session renewal so only one caller re-authenticates at a time
+_renew_lock = threading.Lock()
+
+# Seconds after which a saved session is renewed before use
+DEFAULT_SESSION_MAX_AGE = 900
+
 def print_ascii_art():
     art = r'''
  __     __  _____   __   __ 
@@ -20,14 +32,40 @@ def print_ascii_art():
     '''
     print(art) # Kept standard print so ascii isn't prefixed with logger formats
 
+def vault_base_url(dns):
+    """Returns the base URL for a Vault DNS. An explicit http:// or https:// scheme (e.g. a local simulator) is kept."""
+    if dns.startswith(("http://", "https://")):
+        return dns.rstrip("/")
+    return f"https://{dns}"
+
+def _authenticate(dns, username, password):
+    """POSTs to /auth and publishes the resulting session. Exits on failure."""
+    url = f"{vault_base_url(dns)}/api/{API_VERSION}/auth"
+    payload = {"username": username, "password": password}
+    response = transport.request("POST", url, data=payload, headers={"X-VaultAPI-ClientID": CLIENT_ID})
+
+    if response.status_code != 200:
+        logging.error(f"Login failed: {response.text}")
+        sys.exit(1)
+
+    session_id = response.json().get("sessionId")
+    config = {
+        "vault_dns": dns,
+        "username": username,
+        "password": password,
+        "session_id": session_id,
+        "session_created_at": time.time(),
+    }
+    _store_config(config)
+    return config
+
 def login(dns=None, username=None, password=None, silent=False):
-    if not silent:
-        print_ascii_art()
+    if silent:
+        return renew_session()
+
+    print_ascii_art()
 
-    config = {}
-    if os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, 'r') as f:
-            config = json.load(f)
+    config = _load_cached_config() or {}
 
     dns = dns or os.getenv("VAULT_DNS") or config.get("vault_dns")
     username = username or os.getenv("VAULT_USERNAME") or config.get("username")
@@ -40,38 +78,92 @@ def login(dns=None, username=None, password=None, silent=False):
     if not password:
         password = getpass(f"Vault Password for {username}: ")
 
-    url = f"https://{dns}/api/{API_VERSION}/auth"
-    payload = {"username": username, "password": password}
-    
-    if not silent: logging.info(f"Authenticating to {dns}...")
-    
-    response = requests.post(url, data=payload, headers={"X-VaultAPI-ClientID": CLIENT_ID})
-    
-    if response.status_code == 200:
-        session_id = response.json().get("sessionId")
-        config = {
-            "vault_dns": dns, 
-            "username": username,
-            "password": password,
-            "session_id": session_id
-        }
-        with open(CONFIG_FILE, 'w') as f:
-            json.dump(config, f)
-            
-        # Per spec, login resets the state cache
-        if os.path.exists(".vdx_state.json"):
-            os.remove(".vdx_state.json")
-            if not silent: logging.info("Cleared local state cache (.vdx_state.json).")
-
-        if not silent: logging.info("Login successful! Session and credentials saved locally.")
+    logging.info(f"Authenticating to {dns}...")
+    config = _authenticate(dns, username, password)
+
+    # Per spec, an explicit login resets the state cache
+    if os.path.exists(".vdx_state.journal"):
+        os.remove(".vdx_state.journal")
+    if os.path.exists(".vdx_state.json"):
+        os.remove(".vdx_state.json")
+        logging.info("Cleared local state cache (.vdx_state.json).")
+
+    logging.info("Login successful! Session and credentials saved locally.")
+    return config
+
+def renew_session(stale_session_id=None, reason="expired"):
+    """
+    Replaces the session with a fresh one using the saved credentials. Renewal is
+    single-flight: concurrent callers queue on a lock, and whoever finds that the
+    session no longer matches the `stale_session_id` it saw simply reuses the one
+    another caller already obtained. Never touches the local state cache.
+    """
+    with _renew_lock:
+        config = _load_cached_config() or {}
+        if stale_session_id is not None and config.get("session_id") not in (None, stale_session_id):
+            return config
+
+        dns = os.getenv("VAULT_DNS") or config.get("vault_dns")
+        username = os.getenv("VAULT_USERNAME") or config.get("username")
+        password = os.getenv("VAULT_PASSWORD") or config.get("password")
+        if not dns or not username:
+            logging.error("Error: VAULT_DNS and VAULT_USERNAME are required.")
+            sys.exit(1)
+        if not password:
+            password = getpass(f"Vault Password for {username}: ")
+
+        logging.debug(f"Renewing Vault session for {username}...")
+        config = _authenticate(dns, username, password)
+        metrics.inc("vdx_session_renewals_total", reason=reason)
         return config
-    else:
-        logging.error(f"Login failed: {response.text}")
-        sys.exit(1)
 
-def get_config():
+def _session_max_age():
+    return float(os.getenv("VDX_SESSION_MAX_AGE", DEFAULT_SESSION_MAX_AGE))
+
+def ensure_fresh_session(config):
+    """
+    Renews the session ahead of time once it is older than VDX_SESSION_MAX_AGE
+    seconds (0 disables), so long runs do not pay a failed request first.
+    """
+    max_age = _session_max_age()
+    if max_age <= 0:
+        return config
+    if time.time() - config.get("session_created_at", 0) < max_age:
+        return config
+    logging.debug("Session is older than VDX_SESSION_MAX_AGE; renewing proactively.")
+    return renew_session(config.get("session_id"), reason="max_age")
+
+def _read_config_file():
     if not os.path.exists(CONFIG_FILE):
-        logging.error("Error: Not logged in. Run 'vdx login' first.")
-        sys.exit(1)
+        return None
     with open(CONFIG_FILE, 'r') as f:
         return json.load(f)
+
+def _load_cached_config():
+    global _config
+    with _config_lock:
+        if _config is None:
+            _config = _read_config_file()
+        return _config
+
+def _store_config(config):
+    """
+    Publishes a new config to all callers and persists it. The file is only
+    rewritten when the contents actually changed (e.g. a renewed session).
+    """
+    global _config
+    with _config_lock:
+        current = _config if _config is not None else _read_config_file()
+        if config != current:
+            tmp_path = f"{CONFIG_FILE}.tmp"
+            with open(tmp_path, 'w') as f:
+                json.dump(config, f)
+            os.replace(tmp_path, CONFIG_FILE)
+        _config = config
+
+def get_config():
+    config = _load_cached_config()
+    if config is None:
+        logging.error("Error: Not logged in. Run 'vdx login' first.")
+        sys.exit(1)
+    return config
@@ -0,0 +1,105 @@
+import os
+import json
+import time
+import logging
+import threading
+from vdx.api import make_vault_request, API_VERSION
+from vdx.auth import get_config
+
+CATALOG_FILE = ".vdx_catalog.json"
+# Seconds a persisted catalog is trusted without asking Vault again
+DEFAULT_CATALOG_TTL = 300
+
+_catalog = None
+_catalog_lock = threading.Lock()
+
+def _catalog_ttl():
+    return float(os.getenv("VDX_CATALOG_TTL", DEFAULT_CATALOG_TTL))
+
+def _load_cached_catalog(vault_dns):
+    if not os.path.exists(CATALOG_FILE):
+        return None
+    try:
+        with open(CATALOG_FILE, 'r') as f:
+            cached = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        logging.debug(f"Ignoring unreadable {CATALOG_FILE}.")
+        return None
+    if cached.get("vault_dns") != vault_dns or not isinstance(cached.get("data"), list):
+        return None
+    return cached
+
+def _save_catalog(cached):
+    tmp_path = f"{CATALOG_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        json.dump(cached, f)
+    os.replace(tmp_path, CATALOG_FILE)
+
+def _fetch_catalog(cached, vault_dns):
+    """Calls GET /metadata/components, revalidating `cached` with its ETag when available."""
+    headers = {}
+    if cached and cached.get("etag"):
+        headers["If-None-Match"] = cached["etag"]
+
+    logging.debug("Fetching component type metadata...")
+    meta_endpoint = f"/api/{API_VERSION}/metadata/components"
+    response = make_vault_request("GET", meta_endpoint, headers=headers)
+
+    if response.status_code == 304 and cached:
+        logging.debug("Component type metadata unchanged (ETag match).")
+        cached["fetched_at"] = time.time()
+        return cached
+
+    if response.status_code != 200:
+        logging.error("Component Metadata: Request failed.")
+        return None
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        logging.error("Component Metadata: Failed to parse API response as JSON.")
+        return None
+    if data.get("responseStatus") not in ("SUCCESS", "WARNING"):
+        logging.error("Component Metadata: API call reported non-SUCCESS status.")
+        return None
+
+    return {
+        "vault_dns": vault_dns,
+        "fetched_at": time.time(),
+        "etag": response.headers.get("ETag"),
+        "data": data.get("data", []),
+    }
+
+def get_component_types():
+    """
+    Returns the component type metadata list from GET /metadata/components, or None
+    if it could not be retrieved. The payload is fetched at most once per process and
+    persisted to .vdx_catalog.json, so repeated runs within the TTL skip the call.
+    """
+    global _catalog
+    with _catalog_lock:
+        if _catalog is not None:
+            return _catalog["data"]
+
+        vault_dns = get_config().get("vault_dns")
+        cached = _load_cached_catalog(vault_dns)
+        if cached and time.time() - cached.get("fetched_at", 0) < _catalog_ttl():
+            logging.debug(f"Using cached component type metadata from {CATALOG_FILE}.")
+            _catalog = cached
+            return _catalog["data"]
+
+        fetched = _fetch_catalog(cached, vault_dns)
+        if fetched is None:
+            return None
+        try:
+            _save_catalog(fetched)
+        except OSError as e:
+            logging.debug(f"Could not persist {CATALOG_FILE}: {e}")
+        _catalog = fetched
+        return _catalog["data"]
+
+def get_component_type_names(component_class):
+    """Returns the names of component types of the given class (e.g. 'metadata', 'code'), or None on failure."""
+    component_types = get_component_types()
+    if component_types is None:
+        return None
+    return [comp["name"] for comp in component_types if comp.get("class") == component_class]
@@ -1,12 +1,31 @@
+import os
+import time
 import argparse
 import logging
 from vdx.auth import login
 from vdx.commands.pull import run_pull
-from vdx.commands.push import run_push
+from vdx.commands.push import run_push, DEFAULT_MDL_BATCH_SIZE, DEFAULT_MDL_BATCH_BYTES
 from vdx.commands.package import run_package
 from vdx.commands.clean import run_clean
 from vdx.commands.patch import run_patch
 from vdx.utils import load_dotenv
+from vdx.transport import log_connection_stats, ensure_pool_size
+from vdx import profiler, metrics
+
+DEFAULT_JOBS = 4
+DEFAULT_PROFILE_FILE = "vdx_profile.json"
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError("must be a positive integer")
+    return number
+
+def non_negative_int(value):
+    number = int(value)
+    if number < 0:
+        raise argparse.ArgumentTypeError("must be 0 or a positive integer")
+    return number
 
 def main():
     # Load .env variables into os.environ before anything else runs
@@ -14,6 +33,10 @@ def main():
 
     parser = argparse.ArgumentParser(description="vdx - Veeva Vault Configuration Manager")
     parser.add_argument("--verbose", action="store_true", help="Enable verbose/debug logging")
+    parser.add_argument("--profile", action="store_true", help="Write a Chrome/Perfetto trace of command phases and API requests")
+    parser.add_argument("--profile-output", default=DEFAULT_PROFILE_FILE, metavar="FILE", help=f"Trace file for --profile (default {DEFAULT_PROFILE_FILE})")
+    parser.add_argument("--profile-cpu", metavar="FILE", help="Write a cProfile dump of the hashing and zip code paths")
+    parser.add_argument("--metrics-dir", default=os.getenv("VDX_METRICS_DIR"), metavar="DIR", help="Write a JSON and Prometheus textfile metrics summary of the run to DIR (or set VDX_METRICS_DIR)")
     
     subparsers = parser.add_subparsers(dest="command", required=True)
     
@@ -26,14 +49,21 @@ def main():
     pull_parser = subparsers.add_parser("pull", help="Pull all component types from Vault (MDL, SDK, Pages, etc.)")
     pull_parser.add_argument("--verbose", action="store_true", help=argparse.SUPPRESS)
     pull_parser.add_argument("--translations", action="store_true", help="Include bulk translations in the pull operation.")
+    pull_parser.add_argument("--incremental", action="store_true", help="Only download components modified since the last pull")
+    pull_parser.add_argument("-j", "--jobs", type=positive_int, default=DEFAULT_JOBS, help=f"Number of concurrent downloads (default {DEFAULT_JOBS})")
     
     push_parser = subparsers.add_parser("push", help="Push local changes to Vault (MDL, SDK, Pages, etc.)")
     push_parser.add_argument("--dry-run", action="store_true", help="Print changes without modifying")
     push_parser.add_argument("--verbose", action="store_true", help=argparse.SUPPRESS)
     push_parser.add_argument("--translations", action="store_true", help="Include bulk translations in the push operation.")
+    push_parser.add_argument("-j", "--jobs", type=positive_int, default=DEFAULT_JOBS, help=f"Number of concurrent MDL batches, Java SDK and Custom Page uploads (default {DEFAULT_JOBS})")
+    push_parser.add_argument("--verify", action="store_true", help="Rehash every file instead of trusting unchanged size/mtime")
+    push_parser.add_argument("--mdl-batch-size", type=non_negative_int, default=DEFAULT_MDL_BATCH_SIZE, help=f"Max components per MDL execute call, 0 for no limit (default {DEFAULT_MDL_BATCH_SIZE})")
+    push_parser.add_argument("--mdl-batch-bytes", type=non_negative_int, default=DEFAULT_MDL_BATCH_BYTES, help=f"Max MDL script size in bytes per call, 0 for no limit (default {DEFAULT_MDL_BATCH_BYTES})")
     
     package_parser = subparsers.add_parser("package", help="Create, import, and validate a VPK")
     package_parser.add_argument("--verbose", action="store_true", help=argparse.SUPPRESS)
+    package_parser.add_argument("--verify", action="store_true", help="Rehash every file instead of trusting unchanged size/mtime")
     
     clean_parser = subparsers.add_parser("clean", help="Remove local cache files (.vdx_config, .vdx_state.json)")
     clean_parser.add_argument("--verbose", action="store_true", help=argparse.SUPPRESS)
@@ -41,12 +71,41 @@ def main():
     patch_parser = subparsers.add_parser("patch", help="Generate a patch file of local changes")
     patch_parser.add_argument("--verbose", action="store_true", help=argparse.SUPPRESS)
     patch_parser.add_argument("--json", action="store_true", help="Output changes as JSON for VSCode extension")
+    patch_parser.add_argument("--verify", action="store_true", help="Rehash every file instead of trusting unchanged size/mtime")
+    patch_parser.add_argument("--remote", action="store_true", help="Fetch originals from Vault instead of the local base-content store")
     
     args = parser.parse_args()
     
     log_level = logging.DEBUG if args.verbose else logging.INFO
     logging.basicConfig(level=log_level, format='%(message)s')
-    
+
+    if getattr(args, "jobs", None):
+        # Make sure parallel workers never wait on a pooled connection
+        ensure_pool_size(args.jobs)
+
+    if args.profile or args.profile_cpu:
+        profiler.enable(cpu=bool(args.profile_cpu))
+
+    started = time.perf_counter()
+    exit_code = 1
+    try:
+        with profiler.span(f"vdx {args.command}", "command"):
+            _run_command(args)
+        exit_code = 0
+    except SystemExit as e:
+        exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        raise
+    finally:
+        # package and patch exit via sys.exit, so report from a finally block
+        log_connection_stats()
+        if args.metrics_dir:
+            metrics.write_reports(args.metrics_dir, args.command, time.perf_counter() - started, exit_code)
+        if args.profile:
+            profiler.write_trace(args.profile_output)
+        if args.profile_cpu:
+            profiler.write_cpu_profile(args.profile_cpu)
+
+def _run_command(args):
     if args.command == "login":
         login(args.vault_dns, args.username, args.password)
     elif args.command == "pull":
@@ -1,13 +1,17 @@
 import os
+import shutil
 import logging
 
 CONFIG_FILE = ".vdx_config"
 STATE_FILE = ".vdx_state.json"
+STATE_JOURNAL_FILE = ".vdx_state.journal"
+CATALOG_FILE = ".vdx_catalog.json"
+OBJECT_STORE_DIR = ".vdx_objects"
 
 def run_clean(args):
     """Removes local cache files."""
     logging.info("Cleaning local cache files...")
-    files_to_remove = [CONFIG_FILE, STATE_FILE]
+    files_to_remove = [CONFIG_FILE, STATE_FILE, STATE_JOURNAL_FILE, CATALOG_FILE]
     for f in files_to_remove:
         if os.path.exists(f):
             try:
@@ -17,4 +21,10 @@ def run_clean(args):
                 logging.error(f"Error removing file {f}: {e}")
         else:
             logging.info(f"{f} not found, skipping.")
+    if os.path.isdir(OBJECT_STORE_DIR):
+        try:
+            shutil.rmtree(OBJECT_STORE_DIR)
+            logging.info(f"Removed {OBJECT_STORE_DIR}/")
+        except OSError as e:
+            logging.error(f"Error removing directory {OBJECT_STORE_DIR}: {e}")
     logging.info("Clean complete.")
\ No newline at end of file
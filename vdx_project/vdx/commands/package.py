@@ -5,8 +5,10 @@ import logging
 import time
 from pathlib import Path
 import json
+from vdx import profiler
 from vdx.api import make_vault_request, API_VERSION
-from vdx.utils import compute_checksum, load_state
+from vdx.utils import load_state, scan_files, compute_checksum
+from vdx.planner import plan_mdl_deployment
 
 def poll_job_status(job_id, job_type="job"):
     """
@@ -82,17 +84,22 @@ def run_package(args):
     state = load_state()
     logging.info("Analyzing local components for changes...")
     
-    modified_files = []
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith(".mdl"):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                current_checksum = compute_checksum(content)
-                if state.get(file_path) != current_checksum:
-                    modified_files.append((file_path, content, current_checksum))
+    local_files = scan_files([base_dir], state, suffix=".mdl", verify=args.verify)
+    modified_contents = {}
+    for file_path, current_checksum in local_files.items():
+        if state.get(file_path) != current_checksum:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                modified_contents[file_path] = f.read()
+
+    # Steps follow the dependency plan so referenced components are deployed first
+    with profiler.span("plan_mdl_deployment", components=len(modified_contents)):
+        steps, _ = plan_mdl_deployment(modified_contents)
+    # The .md5 must match the packaged text (read with newline translation), not the raw
+    # bytes hashed by scan_files, which only decides what changed
+    modified_files = [
+        (file_path, modified_contents[file_path], compute_checksum(modified_contents[file_path]))
+        for _, layer in steps for file_path in layer
+    ]
 
     if not modified_files:
         logging.info("No modified components found. Package creation skipped.")
@@ -100,7 +107,8 @@ def run_package(args):
 
     logging.info(f"Packaging {len(modified_files)} modified components into {vpk_filename}...")
     
-    with zipfile.ZipFile(vpk_filename, 'w', zipfile.ZIP_DEFLATED) as vpk:
+    with profiler.span("build VPK", "cpu", components=len(modified_files)), profiler.cpu_profile(), \
+            zipfile.ZipFile(vpk_filename, 'w', zipfile.ZIP_DEFLATED) as vpk:
         with open(template_path, 'r', encoding='utf-8') as tf:
             manifest_template = tf.read()
             
@@ -138,7 +146,8 @@ def run_package(args):
             # Fallback for older API versions or immediate returns
             package_id = resp_json.get("data", {}).get("package_id__v")
         else:
-            job_info = poll_job_status(job_id, "import job")
+            with profiler.span("wait for import job"):
+                job_info = poll_job_status(job_id, "import job")
             if not job_info:
                 logging.error("Import failed during job execution.")
                 sys.exit(1)
@@ -168,7 +177,8 @@ def run_package(args):
             val_job_id = val_res.json().get("job_id")
             
             if val_job_id:
-                val_job_info = poll_job_status(val_job_id, "validation job")
+                with profiler.span("wait for validation job"):
+                    val_job_info = poll_job_status(val_job_id, "validation job")
                 if val_job_info and val_job_info.get("status") == "SUCCESS":
                     logging.info(f"Package validation completed successfully.")
                 else:
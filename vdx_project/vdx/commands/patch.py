@@ -6,23 +6,64 @@ from pathlib import Path
 import json
 import tempfile
 
-from vdx.api import make_vault_request, API_VERSION
-from vdx.utils import load_state, compute_checksum
+from vdx import profiler
+from vdx.catalog import get_component_type_names
+from vdx.commands.pull import iter_component_records, vql_string
+from vdx.utils import load_state, scan_files, load_object
 
-def get_vault_mdl_content(component_type, component_name):
+# Component names per VQL query when fetching originals in batches
+QUERY_BATCH_SIZE = 100
+
+# (component_type, component_name) -> original MDL, or None if it could not be fetched.
+# Lives for the duration of the run so each component is queried at most once.
+_mdl_cache = {}
+
+def fetch_vault_mdl_contents(components):
     """
-    Fetches the MDL content for a single component from Vault.
+    Fetches the original MDL for many (component_type, component_name) pairs using
+    batched `component_name__v CONTAINS (...)` queries grouped by component type.
+    Returns a dict keyed by the pair; components that could not be fetched map to None.
     """
-    query = f"SELECT mdl_definition__v FROM vault_component__v WHERE component_type__v = '{component_type}' AND component_name__v = '{component_name}'"
-    endpoint = f"/api/{API_VERSION}/query/components"
-    response = make_vault_request("POST", endpoint, data={"q": query})
-    
-    if response.status_code == 200:
-        data = response.json()
-        if data.get("responseStatus") == "SUCCESS" and data.get("data"):
-            return data["data"][0].get("mdl_definition__v", "")
-    logging.warning(f"Could not fetch original content for {component_type}.{component_name}")
-    return None
+    # The catalog is shared with pull, so this usually costs no API call
+    metadata_types = get_component_type_names("metadata")
+
+    names_by_type = {}
+    for component_type, component_name in components:
+        if (component_type, component_name) in _mdl_cache:
+            continue
+        if metadata_types is not None and component_type not in metadata_types:
+            logging.warning(f"Skipping {component_type}.{component_name}: '{component_type}' is not a metadata component type in Vault.")
+            _mdl_cache[(component_type, component_name)] = None
+            continue
+        names_by_type.setdefault(component_type, []).append(component_name)
+
+    for component_type, names in names_by_type.items():
+        for i in range(0, len(names), QUERY_BATCH_SIZE):
+            batch = names[i:i + QUERY_BATCH_SIZE]
+            names_list = ", ".join(vql_string(n) for n in batch)
+            query = (
+                "SELECT component_name__v, mdl_definition__v FROM vault_component__v "
+                f"WHERE component_type__v = {vql_string(component_type)} AND component_name__v CONTAINS ({names_list})"
+            )
+            logging.debug(f"Fetching original MDL for {len(batch)} {component_type} component(s)...")
+            try:
+                for record in iter_component_records(query, f"Original {component_type} MDL: "):
+                    name = record.get("component_name__v")
+                    if name in batch:
+                        _mdl_cache[(component_type, name)] = record.get("mdl_definition__v", "")
+            except RuntimeError as e:
+                logging.debug(str(e))
+
+            for name in batch:
+                if (component_type, name) not in _mdl_cache:
+                    logging.warning(f"Could not fetch original content for {component_type}.{name}")
+                    _mdl_cache[(component_type, name)] = None
+
+    return {key: _mdl_cache.get(key) for key in components}
+
+def _component_key(file_path):
+    path_parts = Path(file_path).parts
+    return path_parts[-2], path_parts[-1].replace(".mdl", "")
 
 def run_patch(args):
     base_dir = "components"
@@ -35,17 +76,13 @@ def run_patch(args):
     state = load_state()
     logging.info("Analyzing local components for changes...")
     
+    local_files = scan_files([base_dir], state, suffix=".mdl", verify=args.verify)
     modified_files = []
-    for root, dirs, files in os.walk(base_dir):
-        for file in files:
-            if file.endswith(".mdl"):
-                file_path = os.path.join(root, file)
-                with open(file_path, 'r', encoding='utf-8') as f:
-                    content = f.read()
-                
-                current_checksum = compute_checksum(content)
-                if state.get(file_path) != current_checksum:
-                    modified_files.append((file_path, content))
+    for file_path, current_checksum in local_files.items():
+        if state.get(file_path) != current_checksum:
+            with open(file_path, 'r', encoding='utf-8') as f:
+                content = f.read()
+            modified_files.append((file_path, content))
 
     if not modified_files:
         if args.json:
@@ -54,14 +91,32 @@ def run_patch(args):
             logging.info("No modified components found.")
         sys.exit(0)
 
+    originals = {}
+    if args.remote:
+        remote_files = [file_path for file_path, _ in modified_files]
+    else:
+        # Diff against the bytes recorded at the last pull/push; fall back to Vault for
+        # files without a stored original (untracked, e.g. after `vdx login` reset the state).
+        remote_files = []
+        for file_path, _ in modified_files:
+            base_content = load_object(state.get(file_path))
+            if base_content is None:
+                remote_files.append(file_path)
+            else:
+                originals[file_path] = base_content.decode('utf-8')
+        if remote_files:
+            logging.info(f"No local base content for {len(remote_files)} component(s); fetching originals from Vault.")
+
+    if remote_files:
+        with profiler.span("fetch_vault_mdl_contents", components=len(remote_files)):
+            fetched = fetch_vault_mdl_contents([_component_key(file_path) for file_path in remote_files])
+        for file_path in remote_files:
+            originals[file_path] = fetched[_component_key(file_path)]
+
     if args.json:
         json_output = []
         for file_path, current_content in modified_files:
-            path_parts = Path(file_path).parts
-            comp_type = path_parts[-2]
-            comp_name = path_parts[-1].replace(".mdl", "")
-            
-            original_content = get_vault_mdl_content(comp_type, comp_name)
+            original_content = originals.get(file_path)
             
             if original_content is not None:
                 with tempfile.NamedTemporaryFile(mode='w', delete=False, encoding='utf-8', suffix=".mdl") as tmp:
@@ -80,39 +135,9 @@ def run_patch(args):
     logging.info(f"Found {len(modified_files)} modified components. Generating patch...")
 
     all_diffs = []
+    diff_start = profiler.timestamp_us()
     for file_path, current_content in modified_files:
-        path_parts = Path(file_path).parts
-        comp_type = path_parts[-2]
-        comp_name = path_parts[-1].replace(".mdl", "")
-        
-        original_content = get_vault_mdl_content(comp_type, comp_name)
-        
-        if original_content is not None:
-            diff = difflib.unified_diff(
-                original_content.splitlines(keepends=True),
-                current_content.splitlines(keepends=True),
-                fromfile=f"a/{file_path}",
-                tofile=f"b/{file_path}",
-            )
-            all_diffs.extend(list(diff))
-
-    if not all_diffs:
-        logging.info("Could not generate diffs for modified files. This might be due to issues fetching original content from Vault.")
-        sys.exit(0)
-
-    with open(patch_filename, 'w', encoding='utf-8') as f:
-        f.writelines(all_diffs)
-        
-    logging.info(f"Successfully created patch file: {patch_filename}")
-    logging.info(f"Found {len(modified_files)} modified components. Generating patch...")
-
-    all_diffs = []
-    for file_path, current_content in modified_files:
-        path_parts = Path(file_path).parts
-        comp_type = path_parts[-2]
-        comp_name = path_parts[-1].replace(".mdl", "")
-        
-        original_content = get_vault_mdl_content(comp_type, comp_name)
+        original_content = originals.get(file_path)
         
         if original_content is not None:
             diff = difflib.unified_diff(
@@ -122,6 +147,7 @@ def run_patch(args):
                 tofile=f"b/{file_path}",
             )
             all_diffs.extend(list(diff))
+    profiler.add_span("diff components", "cpu", diff_start, profiler.timestamp_us() - diff_start, files=len(modified_files))
 
     if not all_diffs:
         logging.info("Could not generate diffs for modified files. This might be due to issues fetching original content from Vault.")
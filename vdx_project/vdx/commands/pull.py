@@ -3,11 +3,22 @@ import sys
 import logging
 import json
 import time
-import io
 import zipfile
+import hashlib
+import tempfile
 import re
+from concurrent.futures import ThreadPoolExecutor
+from vdx import profiler, metrics
 from vdx.api import make_vault_request, API_VERSION
-from vdx.utils import compute_checksum, load_state, save_state, load_ignore_patterns, is_ignored
+from vdx.catalog import get_component_type_names
+from vdx.utils import (
+    compute_checksum, load_state, save_state, load_ignore_patterns, is_ignored, CHUNK_SIZE,
+    store_object, store_object_file, has_object, prune_objects, file_fingerprint,
+)
+
+# Component names per VQL query when fetching specific components
+NAME_BATCH_SIZE = 100
+
 def truncate_error(data):
     """
     Truncates the error message to the first 1000 characters or 50 lines 
@@ -65,155 +76,385 @@ def _update_local_file(file_path, content, state, is_binary=False):
         os.makedirs(os.path.dirname(file_path), exist_ok=True)
         mode = 'wb' if is_binary else 'w'
         encoding = None if is_binary else 'utf-8'
-        with open(file_path, mode, encoding=encoding) as f:
-            f.write(content)
-        state[file_path] = remote_checksum
+        with profiler.span("write file", "io", path=file_path):
+            with open(file_path, mode, encoding=encoding) as f:
+                f.write(content)
+            store_object(content, remote_checksum)
+        metrics.inc("vdx_files_written_total", source="api")
+        state.record(file_path, remote_checksum, file_fingerprint(file_path))
         logging.info(f"Updated: {file_path}")
         return True
+    if not has_object(remote_checksum):
+        # Backfill the base-content store for checkouts pulled before it existed
+        store_object(content, remote_checksum)
     return False
 
-def pull_mdl_components(state, ignore_patterns):
-    """Pulls MDL for 'metadata' class components."""
+def _update_local_file_from_stream(file_path, stream, known_checksum):
+    """
+    Streams `stream` into `file_path` one chunk at a time while computing its
+    checksum, so memory use is bounded by CHUNK_SIZE. The existing file is only
+    replaced when the checksum differs from `known_checksum`.
+    Returns (checksum, written).
+    """
+    directory = os.path.dirname(file_path)
+    os.makedirs(directory, exist_ok=True)
+    md5 = hashlib.md5()
+    with tempfile.NamedTemporaryFile(dir=directory, prefix=".vdx-", delete=False) as tmp:
+        try:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                md5.update(chunk)
+                tmp.write(chunk)
+        except BaseException:
+            tmp.close()
+            os.remove(tmp.name)
+            raise
+    checksum = md5.hexdigest()
+
+    if checksum == known_checksum:
+        if not has_object(checksum):
+            store_object_file(tmp.name, checksum)
+        os.remove(tmp.name)
+        return checksum, False
+    os.replace(tmp.name, file_path)
+    metrics.inc("vdx_files_written_total", source="stream")
+    if not has_object(checksum):
+        store_object_file(file_path, checksum)
+    return checksum, True
+
+def _pull_distribution(dist_name, base_dir, known_checksums, ignore_patterns):
+    """
+    Downloads one Custom Page distribution to a temp file and extracts it.
+    Returns a list of (file_path, checksum, written) for every non-ignored member.
+    Raises on download or archive errors.
+    """
+    download_endpoint = f"/api/{API_VERSION}/uicode/distributions/{dist_name}/code"
+    with make_vault_request("GET", download_endpoint, stream=True) as resp:
+        # Handle cases where the API returns a JSON error instead of a file
+        if "application/json" in resp.headers.get("Content-Type", ""):
+            try:
+                if resp.json().get("responseStatus") == "FAILURE":
+                    # The API wrapper already logged the error details.
+                    raise RuntimeError("Vault returned a FAILURE response.")
+            except json.JSONDecodeError:
+                pass
+
+        if resp.status_code != 200:
+            raise RuntimeError(f"Download failed. HTTP {resp.status_code}")
+
+        with tempfile.TemporaryFile() as archive:
+            with profiler.span("download distribution", "io", distribution=dist_name) as span_args:
+                for chunk in resp.iter_content(chunk_size=CHUNK_SIZE):
+                    archive.write(chunk)
+                span_args["bytes"] = archive.tell()
+            metrics.inc("vdx_api_bytes_received_total", archive.tell())
+            archive.seek(0)
+
+            extracted = []
+            try:
+                with profiler.span("extract distribution", "cpu", distribution=dist_name), profiler.cpu_profile(), \
+                        zipfile.ZipFile(archive) as zip_file:
+                    for info in zip_file.infolist():
+                        if info.is_dir():
+                            continue
+
+                        file_path = os.path.join(base_dir, dist_name, info.filename)
+                        if is_ignored(file_path, ignore_patterns):
+                            continue
+
+                        with zip_file.open(info) as member:
+                            checksum, written = _update_local_file_from_stream(
+                                file_path, member, known_checksums.get(file_path, "")
+                            )
+                        extracted.append((file_path, checksum, written))
+            except zipfile.BadZipFile:
+                raise RuntimeError("It may not be a valid zip file.")
+    return extracted
+
+def _fetch_query_page(method, url, payload, context):
+    response = make_vault_request(method, url, data=payload)
+    data = _handle_api_response(response, context)
+    if data is None:
+        raise RuntimeError(f"{context}Query page could not be retrieved.")
+    return data
+
+def iter_component_records(query, context=""):
+    """
+    Runs a /query/components VQL query and yields its records one at a time,
+    following next_page links. The next page is prefetched on a background
+    thread while the caller processes the current one, so at most two pages
+    are held in memory. Raises RuntimeError if any page fails.
+    """
+    endpoint = f"/api/{API_VERSION}/query/components"
+    with ThreadPoolExecutor(max_workers=1) as prefetcher:
+        future = prefetcher.submit(_fetch_query_page, "POST", endpoint, {"q": query}, context)
+        while future is not None:
+            data = future.result()
+            next_url = data.get("responseDetails", {}).get("next_page")
+            if next_url:
+                logging.debug(f"{context}Prefetching next page...")
+                future = prefetcher.submit(_fetch_query_page, "GET", next_url, None, context)
+            else:
+                future = None
+            yield from data.get("data", [])
+
+def vql_string(value):
+    """Quotes `value` as a VQL string literal. Use it for every literal put into a query."""
+    return "'" + value.replace("\\", "\\\\").replace("'", "\\'") + "'"
+
+def _mdl_type_filter(metadata_types, ignore_patterns):
+    """
+    Builds the VQL condition selecting `metadata_types`. Component names that
+    .vdxignore always excludes are filtered out server-side with NOT LIKE, so they
+    are never transferred. Returns (filter, narrowed) where `narrowed` says whether
+    any name exclusion was applied.
+    """
+    plain_types = []
+    clauses = []
+    for comp_type in metadata_types:
+        globs = ignore_patterns.excluded_name_globs(comp_type) if ignore_patterns else []
+        if not globs:
+            plain_types.append(comp_type)
+            continue
+        exclusions = " AND ".join(f"component_name__v NOT LIKE {vql_string(g.replace('*', '%'))}" for g in globs)
+        clauses.append(f"(component_type__v = {vql_string(comp_type)} AND {exclusions})")
+
+    if plain_types:
+        types_list = ", ".join(vql_string(t) for t in plain_types)
+        clauses.insert(0, f"component_type__v CONTAINS ({types_list})")
+    if len(clauses) == 1:
+        return clauses[0], not plain_types
+    return "(" + " OR ".join(clauses) + ")", True
+
+def _iter_records_with_fallback(query, fallback_query, context):
+    """
+    Yields the records of `query`, switching to `fallback_query` if Vault rejects
+    the first page (e.g. a filter it does not support). Callers still filter
+    client-side, so the fallback only costs bandwidth.
+    """
+    records = iter_component_records(query, context)
+    try:
+        first = next(records, None)
+    except RuntimeError:
+        if query == fallback_query:
+            raise
+        logging.warning(f"{context}Filtered query was rejected; retrying without server-side ignore filters.")
+        records = iter_component_records(fallback_query, context)
+        first = next(records, None)
+    if first is not None:
+        yield first
+        yield from records
+
+def pull_mdl_components(state, ignore_patterns, incremental=False):
+    """
+    Pulls MDL for 'metadata' class components. With `incremental`, only components
+    modified since the last pull's high-water mark (plus any never pulled) are
+    downloaded; a name-only listing detects deletions.
+    """
     logging.info("Pulling MDL components...")
     vault_files = {}
     updated_count = 0
 
     # 1. Get component types for 'metadata' class
-    logging.debug("Fetching component metadata to identify 'metadata' class types...")
-    meta_endpoint = f"/api/{API_VERSION}/metadata/components"
-    meta_response = make_vault_request("GET", meta_endpoint)
-    meta_data = _handle_api_response(meta_response, "Component Metadata: ")
-    if not meta_data:
-        return {}, 0
-    
-    metadata_types = [
-        comp["name"] for comp in meta_data.get("data", []) 
-        if comp.get("class") == "metadata"
-    ]
-    
+    logging.debug("Identifying 'metadata' class component types...")
+    metadata_types = get_component_type_names("metadata")
+    if metadata_types is None:
+        # Raising keeps run_pull from treating the missing listing as deletions in Vault
+        raise RuntimeError("Could not retrieve 'metadata' component types.")
+
     if not metadata_types:
         logging.info("No 'metadata' class component types found.")
         return {}, 0
-    
-    # 2. Build and execute VQL query
-    types_list = ", ".join([f"'{t}'" for t in metadata_types])
-    query = f"SELECT component_name__v, component_type__v, mdl_definition__v FROM vault_component__v WHERE component_type__v CONTAINS ({types_list})"
-    endpoint = f"/api/{API_VERSION}/query/components"
-    response = make_vault_request("POST", endpoint, data={"q": query})
-    data = _handle_api_response(response, "MDL Components: ")
-    if not data:
-        return {}, 0
-
-    records = data.get("data", [])
-    current_data = data
-    while current_data.get("responseDetails", {}).get("next_page"):
-        next_url = current_data["responseDetails"]["next_page"]
-        logging.info("Traversing next page for MDL...")
-        response = make_vault_request("GET", next_url)
-        current_data = response.json()
-        records.extend(current_data.get("data", []))
 
+    # Types whose whole directory is ignored are left out of the VQL rather than downloaded and discarded
     base_dir = "components"
-    for record in records:
-        comp_type = record.get("component_type__v")
-        comp_name = record.get("component_name__v")
-        mdl_def = record.get("mdl_definition__v", "")
-        if not comp_type or not comp_name:
-            logging.warning("Skipping record with missing name or type.")
-            continue
+    excluded = set(ignore_patterns.excluded_component_types(metadata_types)) if ignore_patterns else set()
+    if excluded:
+        logging.debug(f"Skipping ignored component types: {', '.join(sorted(excluded))}")
+        metadata_types = [t for t in metadata_types if t not in excluded]
+        if not metadata_types:
+            logging.info("All 'metadata' class component types are ignored.")
+            return {}, 0
+
+    # 2. Build and execute VQL queries, streaming records page by page
+    types_list = ", ".join(vql_string(t) for t in metadata_types)
+    unfiltered = f"component_type__v CONTAINS ({types_list})"
+    type_filter, narrowed = _mdl_type_filter(metadata_types, ignore_patterns)
+    if narrowed:
+        logging.debug(f"Excluding ignored component names in VQL: {type_filter}")
+    select = "SELECT component_name__v, component_type__v, mdl_definition__v, modified_date__v FROM vault_component__v"
+    since = state.meta.get("mdl_modified_since") if incremental else None
+    high_water_mark = since
+
+    if since:
+        logging.info(f"Incremental pull: fetching MDL components modified since {since}...")
+        listing = "SELECT component_name__v, component_type__v FROM vault_component__v WHERE {}"
+        untracked = {}
+        for record in _iter_records_with_fallback(listing.format(type_filter), listing.format(unfiltered), "MDL Listing: "):
+            comp_type = record.get("component_type__v")
+            comp_name = record.get("component_name__v")
+            if not comp_type or not comp_name:
+                continue
+            file_path = os.path.join(base_dir, comp_type, f"{comp_name}.mdl")
+            if is_ignored(file_path, ignore_patterns):
+                continue
+            vault_files[file_path] = True
+            if file_path not in state:
+                untracked.setdefault(comp_type, []).append(comp_name)
+
+        # Inclusive bound: components saved in the same second as the mark are re-checked
+        queries = [(f"{select} WHERE {type_filter} AND modified_date__v >= {vql_string(since)}",
+                    f"{select} WHERE {unfiltered} AND modified_date__v >= {vql_string(since)}")]
+        for comp_type, names in untracked.items():
+            for i in range(0, len(names), NAME_BATCH_SIZE):
+                names_list = ", ".join(vql_string(n) for n in names[i:i + NAME_BATCH_SIZE])
+                query = f"{select} WHERE component_type__v = {vql_string(comp_type)} AND component_name__v CONTAINS ({names_list})"
+                queries.append((query, query))
+    else:
+        queries = [(f"{select} WHERE {type_filter}", f"{select} WHERE {unfiltered}")]
+
+    for query, fallback_query in queries:
+        for record in _iter_records_with_fallback(query, fallback_query, "MDL Components: "):
+            comp_type = record.get("component_type__v")
+            comp_name = record.get("component_name__v")
+            mdl_def = record.get("mdl_definition__v", "")
+            if not comp_type or not comp_name:
+                logging.warning("Skipping record with missing name or type.")
+                continue
 
-        file_path = os.path.join(base_dir, comp_type, f"{comp_name}.mdl")
-        if is_ignored(file_path, ignore_patterns):
-            continue
+            modified_date = record.get("modified_date__v")
+            if modified_date and (high_water_mark is None or modified_date > high_water_mark):
+                high_water_mark = modified_date
 
-        vault_files[file_path] = True
-        if _update_local_file(file_path, mdl_def, state):
-            updated_count += 1
+            file_path = os.path.join(base_dir, comp_type, f"{comp_name}.mdl")
+            if is_ignored(file_path, ignore_patterns):
+                continue
+
+            vault_files[file_path] = True
+            if _update_local_file(file_path, mdl_def, state):
+                updated_count += 1
 
+    # Only reached when every query completed, so nothing older than the mark was missed
+    if high_water_mark:
+        state.meta["mdl_modified_since"] = high_water_mark
     return vault_files, updated_count
 
-def pull_java_sdk(state, ignore_patterns):
-    """Pulls 'code' class components as individual Java files."""
+def _download_java_class(comp_name):
+    """Fetches the source of a single Java class. Raises on any API failure."""
+    code_endpoint = f"/api/{API_VERSION}/code/{comp_name}"
+    resp = make_vault_request("GET", code_endpoint)
+
+    # The API can return 200 OK but with a FAILURE status in the JSON body (e.g., file not found).
+    # We check for this case before attempting to process the text as source code.
+    try:
+        if resp.json().get("responseStatus") == "FAILURE":
+            # The API wrapper in make_vault_request already logged the detailed error.
+            raise RuntimeError("Vault returned a FAILURE response.")
+    except json.JSONDecodeError:
+        # Not a JSON response, so it's likely the source code we want.
+        pass
+
+    if resp.status_code != 200:
+        raise RuntimeError(f"Failed to download source. HTTP {resp.status_code}")
+    return resp.text
+
+def pull_java_sdk(state, ignore_patterns, jobs=1, incremental=False):
+    """
+    Pulls 'code' class components as individual Java files. With `incremental`,
+    classes that are already tracked and unmodified since the last pull are skipped.
+    """
     logging.info("Pulling Java SDK source files...")
     vault_files = {}
     updated_count = 0
     base_dir = "javasdk"
 
     # 1. Get component types for 'code' class
-    logging.debug("Fetching component metadata to identify 'code' class types...")
-    meta_endpoint = f"/api/{API_VERSION}/metadata/components"
-    meta_response = make_vault_request("GET", meta_endpoint)
-    meta_data = _handle_api_response(meta_response, "Component Metadata: ")
-    if not meta_data:
-        return {}, 0
-        
-    code_types = [
-        comp["name"] for comp in meta_data.get("data", []) 
-        if comp.get("class") == "code"
-    ]
-    
+    logging.debug("Identifying 'code' class component types...")
+    code_types = get_component_type_names("code")
+    if code_types is None:
+        raise RuntimeError("Could not retrieve 'code' component types.")
+
     if not code_types:
         logging.info("No 'code' class component types found.")
         return {}, 0
 
     # 2. Build and execute VQL query for component names
-    types_list = ", ".join([f"'{t}'" for t in code_types])
-    query = f"SELECT component_name__v FROM vault_component__v WHERE component_type__v CONTAINS ({types_list})"
-    endpoint = f"/api/{API_VERSION}/query/components"
-    response = make_vault_request("POST", endpoint, data={"q": query})
-    data = _handle_api_response(response, "Java SDK Components: ")
-    if not data:
-        return {}, 0
-
-    for record in data.get("data", []):
+    types_list = ", ".join(vql_string(t) for t in code_types)
+    query = f"SELECT component_name__v, modified_date__v FROM vault_component__v WHERE component_type__v CONTAINS ({types_list})"
+    since = state.meta.get("java_modified_since") if incremental else None
+    high_water_mark = since
+    if since:
+        logging.info(f"Incremental pull: downloading Java classes modified since {since}...")
+    tracked_classes = {
+        os.path.basename(path)[:-len(".java")]: path
+        for path in state if path.startswith(base_dir + os.path.sep) and path.endswith(".java")
+    }
+
+    class_names = []
+    for record in iter_component_records(query, "Java SDK Components: "):
         comp_name = record.get("component_name__v")
         if not comp_name:
             continue
 
+        modified_date = record.get("modified_date__v")
+        if modified_date and (high_water_mark is None or modified_date > high_water_mark):
+            high_water_mark = modified_date
+        if since and modified_date and modified_date < since and comp_name in tracked_classes:
+            vault_files[tracked_classes[comp_name]] = True
+            continue
+
         # Filter by namespace *before* making the API call to avoid errors on system components
         if not comp_name.startswith("com.veeva.vault.custom"):
             logging.debug(f"Skipping '{comp_name}' as it is not in the 'com.veeva.vault.custom' namespace.")
             continue
-
-        code_endpoint = f"/api/{API_VERSION}/code/{comp_name}"
-        resp = make_vault_request("GET", code_endpoint)
-
-        # The API can return 200 OK but with a FAILURE status in the JSON body (e.g., file not found).
-        # We check for this case before attempting to process the text as source code.
-        try:
-            if resp.json().get("responseStatus") == "FAILURE":
-                # The API wrapper in make_vault_request already logged the detailed error.
+        class_names.append(comp_name)
+
+    # 3. Download sources concurrently, but apply results in query order so
+    # disk writes and state updates are identical to a serial run.
+    failures = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [(name, executor.submit(_download_java_class, name)) for name in class_names]
+        for comp_name, future in futures:
+            try:
+                source_code = future.result()
+            except Exception as e:
+                logging.debug(f"Traceback for '{comp_name}':", exc_info=True)
+                failures.append((comp_name, str(e)))
                 continue
-        except json.JSONDecodeError:
-            # Not a JSON response, so it's likely the source code we want.
-            pass
-
-        if resp.status_code != 200:
-            logging.error(f"Failed to download source for '{comp_name}'. HTTP {resp.status_code}")
-            continue
-
-        source_code = resp.text
-        package_match = re.search(r"^\s*package\s+([a-zA-Z0-9_.]+);", source_code, re.MULTILINE)
 
-        if not package_match:
-            logging.warning(f"Could not parse package for '{comp_name}'. File may be invalid or an unexpected API error response.")
-            continue
+            package_match = re.search(r"^\s*package\s+([a-zA-Z0-9_.]+);", source_code, re.MULTILINE)
+            if not package_match:
+                failures.append((comp_name, "Could not parse package. File may be invalid or an unexpected API error response."))
+                continue
 
-        package_name = package_match.group(1)
-        package_path = package_name.replace('.', os.path.sep)
-        file_path = os.path.join(base_dir, package_path, f"{comp_name}.java")
+            package_name = package_match.group(1)
+            package_path = package_name.replace('.', os.path.sep)
+            file_path = os.path.join(base_dir, package_path, f"{comp_name}.java")
 
-        if is_ignored(file_path, ignore_patterns):
-            continue
+            if is_ignored(file_path, ignore_patterns):
+                continue
 
-        vault_files[file_path] = True
-        if _update_local_file(file_path, source_code, state):
-            updated_count += 1
+            vault_files[file_path] = True
+            if _update_local_file(file_path, source_code, state):
+                updated_count += 1
+
+    if failures:
+        logging.error(f"Failed to pull {len(failures)} of {len(class_names)} Java class(es):")
+        for comp_name, reason in failures:
+            logging.error(f"  {comp_name}: {reason}")
+            # Keep the last pulled copy rather than treating the class as deleted in Vault
+            if comp_name in tracked_classes:
+                vault_files[tracked_classes[comp_name]] = True
+    elif high_water_mark:
+        # Only advance the mark when every class made it, so failures are retried
+        state.meta["java_modified_since"] = high_water_mark
 
     return vault_files, updated_count
 
-def pull_custom_pages(state, ignore_patterns):
-    """Pulls and extracts Custom Page distributions."""
+def pull_custom_pages(state, ignore_patterns, jobs=1, incremental=False):
+    """
+    Pulls and extracts Custom Page distributions. With `incremental`, distributions
+    whose checksum matches the one recorded at the last pull are not downloaded.
+    """
     logging.info("Pulling and extracting Custom Page distributions...")
     vault_files = {}
     updated_count = 0
@@ -223,8 +464,7 @@ def pull_custom_pages(state, ignore_patterns):
     response = make_vault_request("GET", endpoint)
     data = _handle_api_response(response, "Custom Pages: ")
     if not data:
-        logging.warning("Could not retrieve custom page distributions. Response was empty or contained errors.")
-        return {}, 0
+        raise RuntimeError("Could not retrieve custom page distributions. Response was empty or contained errors.")
 
     distributions = data.get("data", [])
     if not distributions:
@@ -232,47 +472,148 @@ def pull_custom_pages(state, ignore_patterns):
         return {}, 0
 
     logging.info(f"Found {len(distributions)} custom page distribution(s) to process.")
+    # Workers only read this snapshot; the shared state is updated on the main thread.
+    known_checksums = {p: c for p, c in state.items() if p.startswith(base_dir + os.path.sep)}
+    previous_checksums = state.meta.get("page_checksums", {})
+    page_checksums = {}
+    dist_names = []
     for dist in distributions:
         dist_name = dist.get("name")
-        
-        download_endpoint = f"/api/{API_VERSION}/uicode/distributions/{dist_name}/code"
-        resp = make_vault_request("GET", download_endpoint)
-
-        # Handle cases where the API returns a JSON error instead of a file
-        try:
-            if resp.json().get("responseStatus") == "FAILURE":
-                # The API wrapper already logged the error details.
-                continue
-        except json.JSONDecodeError:
-            # This is expected for a successful file download (it's not JSON).
-            pass
-
-        if resp.status_code != 200:
-            logging.error(f"Failed to download page distribution '{dist_name}'. HTTP {resp.status_code}")
+        if not dist_name:
+            continue
+        remote_checksum = dist.get("checksum")
+        dist_prefix = os.path.join(base_dir, dist_name) + os.path.sep
+        tracked = [p for p in known_checksums if p.startswith(dist_prefix)]
+        if incremental and remote_checksum and tracked and previous_checksums.get(dist_name) == remote_checksum:
+            logging.debug(f"Distribution '{dist_name}' unchanged since last pull; skipping download.")
+            page_checksums[dist_name] = remote_checksum
+            for tracked_file in tracked:
+                vault_files[tracked_file] = True
             continue
+        dist_names.append((dist_name, remote_checksum))
+
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [
+            (name, remote_checksum, executor.submit(_pull_distribution, name, base_dir, known_checksums, ignore_patterns))
+            for name, remote_checksum in dist_names
+        ]
+        for dist_name, remote_checksum, future in futures:
+            try:
+                extracted = future.result()
+            except Exception as e:
+                logging.error(f"Failed to process page distribution '{dist_name}': {e}")
+                logging.debug("Traceback:", exc_info=True)
+                # Keep the last pulled copy rather than treating the distribution as deleted in Vault
+                dist_prefix = os.path.join(base_dir, dist_name) + os.path.sep
+                for tracked_file in state:
+                    if tracked_file.startswith(dist_prefix):
+                        vault_files[tracked_file] = True
+                continue
 
-        try:
-            with zipfile.ZipFile(io.BytesIO(resp.content)) as zip_file:
-                for info in zip_file.infolist():
-                    if info.is_dir():
-                        continue
-                    
-                    file_path = os.path.join(base_dir, dist_name, info.filename)
-                    if is_ignored(file_path, ignore_patterns):
-                        continue
-                    
-                    vault_files[file_path] = True
-                    file_content = zip_file.read(info.filename)
-                    
-                    if _update_local_file(file_path, file_content, state, is_binary=True):
-                        updated_count += 1
-        except zipfile.BadZipFile:
-            logging.error(f"Failed to process page distribution '{dist_name}'. It may not be a valid zip file.")
+            for file_path, checksum, written in extracted:
+                vault_files[file_path] = True
+                if written:
+                    state.record(file_path, checksum, file_fingerprint(file_path))
+                    logging.info(f"Updated: {file_path}")
+                    updated_count += 1
+            if remote_checksum:
+                page_checksums[dist_name] = remote_checksum
 
+    state.meta["page_checksums"] = page_checksums
     return vault_files, updated_count
 
+TRANSLATION_MESSAGE_TYPES = ['field_labels__sys', 'system_messages__sys', 'notification_template_messages__sys', 'user_account_messages__sys']
+# The spec allows one status call every 10 seconds per job
+JOB_POLL_INTERVAL = 10
+# Export jobs still running after this many seconds are given up on
+JOB_TIMEOUT = 30 * 60
+
+def _start_translation_export(lang, msg_type):
+    """
+    Starts a bulk translation export job. Returns the job ID, or None if Vault had
+    nothing to export. Raises RuntimeError if the export could not be started.
+    """
+    logging.info(f"Exporting {msg_type} for language '{lang}'...")
+    export_endpoint = f"/api/{API_VERSION}/messages/{msg_type}/language/{lang}/actions/export"
+    job_start_response = make_vault_request("POST", export_endpoint)
+    job_data = _handle_api_response(job_start_response, f"Export {msg_type}/{lang}: ")
+    if not job_data:
+        raise RuntimeError(f"Could not start the {msg_type} export for '{lang}'.")
+    # The response has a nested data object with 'jobId'
+    if 'data' not in job_data or 'jobId' not in job_data.get('data', {}):
+        # This can happen if there are no translations for the given type/language. The API returns SUCCESS but no job is created.
+        logging.info(f"No export job started for {msg_type}/{lang}. This usually means there are no translations to export.")
+        return None
+    return job_data['data']['jobId']
+
+def _poll_translation_job(job_id, lang, msg_type):
+    """
+    Checks a translation export job once.
+    Returns (status, job_details) where status is 'SUCCESS', 'RUNNING' or 'FAILED'.
+    """
+    # This job type uses the /services/jobs endpoint
+    status_endpoint = f"/api/{API_VERSION}/services/jobs/{job_id}"
+    status_resp = make_vault_request("GET", status_endpoint)
+
+    try:
+        status_data = status_resp.json()
+        if status_data.get("responseStatus") != "SUCCESS":
+            logging.error(f"Job polling for {job_id} failed: {status_data.get('errors')}")
+            return "FAILED", None
+    except json.JSONDecodeError:
+        # This can happen if the API call itself failed and returned non-JSON
+        # The make_vault_request function already logs the error in this case.
+        return "FAILED", None
+
+    # Per the spec, the job details are in the 'data' object
+    job_details = status_data.get("data")
+    if not job_details or not isinstance(job_details, dict):
+        logging.error(f"Polling response for job {job_id} is missing or has an invalid 'data' object.")
+        logging.debug(f"[API DEBUG] Raw Response Body:\n{status_resp.text}")
+        logging.debug("[API DEBUG] Expected a JSON object with a 'data' object containing job details.")
+        return "FAILED", None
+
+    status = job_details.get("status")
+    if status == "SUCCESS":
+        return "SUCCESS", job_details
+    if status in ["ERRORS", "CANCELLED"]:
+        logging.error(f"Job {job_id} for {msg_type}/{lang} failed with status: {status}")
+        return "FAILED", None
+    if status is None:
+        logging.error(f"Could not determine status for job {job_id}. Aborting poll for this job.")
+        return "FAILED", None
+
+    logging.info(f"Polling job {job_id} ({msg_type}/{lang})... status: {status}")
+    return "RUNNING", job_details
+
+def _download_translation_results(job_id, job_details, lang, msg_type):
+    """Downloads the exported CSV for a completed job. Returns the content, or None on failure."""
+    logging.info(f"Job {job_id} completed. Downloading results...")
+
+    # Find the download link from the job content link
+    download_url = None
+    for link in job_details.get("links", []):
+        if link.get("rel") == "content":
+            download_url = link.get("href")
+            break
+
+    if not download_url:
+        logging.warning(f"Could not find content download link for completed job {job_id}. Falling back to constructed URL.")
+        # Fallback to the old method if link is not present
+        download_url = f"/api/{API_VERSION}/messages/{msg_type}/language/{lang}/file"
+
+    results_resp = make_vault_request("GET", download_url)
+    if results_resp.status_code != 200:
+        logging.error(f"Failed to download results for job {job_id} from {download_url}. HTTP {results_resp.status_code}")
+        return None
+    return results_resp.content
+
 def pull_translations(state, ignore_patterns):
-    """Exports and pulls bulk translation files per language and message type, as per spec."""
+    """
+    Exports and pulls bulk translation files per language and message type, as per spec.
+    All export jobs are submitted up front and then polled by a single scheduler that
+    honours the per-job poll interval, downloading each result as soon as it is ready.
+    """
     logging.info("Pulling bulk translations...")
     vault_files = {}
     updated_count = 0
@@ -284,93 +625,73 @@ def pull_translations(state, ignore_patterns):
     lang_response = make_vault_request("POST", lang_endpoint, data={"q": lang_query})
     lang_data = _handle_api_response(lang_response, "Languages Query: ")
     if not lang_data:
-        return {}, 0
+        raise RuntimeError("Could not retrieve active languages.")
     languages = [item['admin_key__sys'] for item in lang_data.get('data', [])]
     logging.info(f"Found active languages: {languages}")
 
-    # 2. Define message types as per spec
-    message_types = ['field_labels__sys', 'system_messages__sys', 'notification_template_messages__sys', 'user_account_messages__sys']
-
-    # 3. Loop through each language and message type to export, poll, and download
+    # 2. Submit an export job for every language and message type
+    pending = []
+    # Languages with a failed export keep their tracked files instead of losing them in the deletion sweep
+    failed_languages = set()
     for lang in languages:
-        for msg_type in message_types:
-            logging.info(f"Exporting {msg_type} for language '{lang}'...")
-
-            # Start export job
-            export_endpoint = f"/api/{API_VERSION}/messages/{msg_type}/language/{lang}/actions/export"
-            job_start_response = make_vault_request("POST", export_endpoint)
-            job_data = _handle_api_response(job_start_response, f"Export {msg_type}/{lang}: ")
-            # The response has a nested data object with 'jobId'
-            if not job_data or 'data' not in job_data or 'jobId' not in job_data.get('data', {}):
-                # This can happen if there are no translations for the given type/language. The API returns SUCCESS but no job is created.
-                logging.info(f"No export job started for {msg_type}/{lang}. This usually means there are no translations to export.")
+        for msg_type in TRANSLATION_MESSAGE_TYPES:
+            file_path = os.path.join(base_dir, lang, f"{msg_type}.csv")
+            if is_ignored(file_path, ignore_patterns):
                 continue
-            job_id = job_data['data']['jobId']
-
-            # Poll job until completion
-            while True:
-                # This job type uses the /services/jobs endpoint
-                status_endpoint = f"/api/{API_VERSION}/services/jobs/{job_id}"
-                status_resp = make_vault_request("GET", status_endpoint)
+            try:
+                job_id = _start_translation_export(lang, msg_type)
+            except RuntimeError as e:
+                logging.error(str(e))
+                failed_languages.add(lang)
+                continue
+            if job_id is not None:
+                now = time.monotonic()
+                pending.append({"job_id": job_id, "lang": lang, "msg_type": msg_type,
+                                "file_path": file_path, "next_poll": now, "deadline": now + JOB_TIMEOUT})
+
+    if pending:
+        logging.info(f"Submitted {len(pending)} export job(s). Waiting for completion...")
+
+    # 3. Poll whichever jobs are due, never more than once per interval per job
+    poll_start = profiler.timestamp_us()
+    job_count = len(pending)
+    while pending:
+        now = time.monotonic()
+        due = [job for job in pending if job["next_poll"] <= now]
+        if not due:
+            with profiler.span("wait for translation jobs", "wait", pending=len(pending)):
+                time.sleep(min(job["next_poll"] for job in pending) - now)
+            continue
 
-                try:
-                    status_data = status_resp.json()
-                    if status_data.get("responseStatus") != "SUCCESS":
-                        logging.error(f"Job polling for {job_id} failed: {status_data.get('errors')}")
-                        break
-                except json.JSONDecodeError:
-                    # This can happen if the API call itself failed and returned non-JSON
-                    # The make_vault_request function already logs the error in this case.
-                    break
-
-                # Per the spec, the job details are in the 'data' object
-                job_details = status_data.get("data")
-                if not job_details or not isinstance(job_details, dict):
-                    logging.error(f"Polling response for job {job_id} is missing or has an invalid 'data' object.")
-                    logging.debug(f"[API DEBUG] Raw Response Body:\n{status_resp.text}")
-                    logging.debug("[API DEBUG] Expected a JSON object with a 'data' object containing job details.")
-                    break
-
-                status = job_details.get("status")
-
-                if status == "SUCCESS":
-                    logging.info(f"Job {job_id} completed. Downloading results...")
-                    
-                    # Find the download link from the job content link
-                    download_url = None
-                    for link in job_details.get("links", []):
-                        if link.get("rel") == "content":
-                            download_url = link.get("href")
-                            break
-                    
-                    if not download_url:
-                        logging.warning(f"Could not find content download link for completed job {job_id}. Falling back to constructed URL.")
-                        # Fallback to the old method if link is not present
-                        download_url = f"/api/{API_VERSION}/messages/{msg_type}/language/{lang}/file"
-
-                    results_resp = make_vault_request("GET", download_url)
-                    if results_resp.status_code == 200:
-                        file_content = results_resp.content
-                        file_path = os.path.join(base_dir, lang, f"{msg_type}.csv")
-                        if not is_ignored(file_path, ignore_patterns):
-                            vault_files[file_path] = True
-                            if _update_local_file(file_path, file_content, state, is_binary=True):
-                                updated_count += 1
-                    else:
-                        logging.error(f"Failed to download results for job {job_id} from {download_url}. HTTP {results_resp.status_code}")
-                    break  # Exit while loop for this job
-
-                if status in ["ERRORS", "CANCELLED"]:
-                    logging.error(f"Job {job_id} for {msg_type}/{lang} failed with status: {status}")
-                    break  # Exit while loop
-                
-                if status is None:
-                    logging.error(f"Could not determine status for job {job_id}. Aborting poll for this job.")
-                    break
-
-                logging.info(f"Polling job {job_id} ({msg_type}/{lang})... status: {status}")
-                time.sleep(10)  # Adhere to 10s limit from spec
+        for job in due:
+            status, job_details = _poll_translation_job(job["job_id"], job["lang"], job["msg_type"])
+            if status == "RUNNING":
+                if time.monotonic() < job["deadline"]:
+                    job["next_poll"] = time.monotonic() + JOB_POLL_INTERVAL
+                    continue
+                logging.error(f"Timed out waiting for export job {job['job_id']} ({job['msg_type']}/{job['lang']}).")
+
+            pending.remove(job)
+            if status != "SUCCESS":
+                failed_languages.add(job["lang"])
+                continue
 
+            file_content = _download_translation_results(job["job_id"], job_details, job["lang"], job["msg_type"])
+            if file_content is None:
+                failed_languages.add(job["lang"])
+                continue
+            vault_files[job["file_path"]] = True
+            if _update_local_file(job["file_path"], file_content, state, is_binary=True):
+                updated_count += 1
+
+    profiler.add_span("translation polling", "phase", poll_start, profiler.timestamp_us() - poll_start, jobs=job_count)
+
+    for lang in sorted(failed_languages):
+        logging.warning(f"Keeping the tracked translation files for '{lang}' because its export did not complete.")
+        lang_prefix = os.path.join(base_dir, lang) + os.path.sep
+        for tracked_file in state:
+            if tracked_file.startswith(lang_prefix):
+                vault_files[tracked_file] = True
     return vault_files, updated_count
 
 def run_pull(args):
@@ -384,26 +705,39 @@ def run_pull(args):
     total_updated = 0
     deleted_count = 0
 
+    jobs = getattr(args, "jobs", 1)
+    incremental = getattr(args, "incremental", False)
+    if incremental:
+        logging.info("Incremental pull: only components changed since the last pull will be downloaded.")
     pull_functions = [
-        pull_mdl_components,
-        pull_java_sdk,
-        pull_custom_pages,
+        (pull_mdl_components, "components", {"incremental": incremental}),
+        (pull_java_sdk, "javasdk", {"jobs": jobs, "incremental": incremental}),
+        (pull_custom_pages, "custom_pages", {"jobs": jobs, "incremental": incremental}),
     ]
 
     if args.translations:
         logging.info("Including translations in pull operation.")
-        pull_functions.append(pull_translations)
+        pull_functions.append((pull_translations, "translations", {}))
 
-    for pull_func in pull_functions:
+    failed_dirs = []
+    for pull_func, base_dir, options in pull_functions:
         try:
-            vault_files, updated_count = pull_func(state, ignore_patterns)
+            with profiler.span(pull_func.__name__) as span_args:
+                vault_files, updated_count = pull_func(state, ignore_patterns, **options)
+                span_args.update(files=len(vault_files), updated=updated_count)
             all_vault_files.update(vault_files)
             total_updated += updated_count
         except Exception as e:
-            logging.error(f"An unexpected error occurred during {pull_func.__name__}: {e}")
+            logging.error(f"{pull_func.__name__} failed: {e}")
             logging.debug("Traceback:", exc_info=True)
+            # An incomplete listing must not be mistaken for deletions in Vault
+            logging.warning(f"Keeping tracked files under {base_dir}/ until it can be listed again.")
+            failed_dirs.append(base_dir + os.path.sep)
 
+    sweep_start = profiler.timestamp_us()
     for tracked_file in list(state.keys()):
+        if any(tracked_file.startswith(d) for d in failed_dirs):
+            continue
         if tracked_file not in all_vault_files:
             if os.path.exists(tracked_file):
                 try:
@@ -412,7 +746,9 @@ def run_pull(args):
                     deleted_count += 1
                 except OSError as e:
                     logging.error(f"Error removing file {tracked_file}: {e}")
-            del state[tracked_file]
+            state.forget(tracked_file)
             
     save_state(state)
+    prune_objects(state)
+    profiler.add_span("remove deleted files and save state", "io", sweep_start, profiler.timestamp_us() - sweep_start, removed=deleted_count)
     logging.info(f"Pull complete. {total_updated} files updated, {deleted_count} files removed.")
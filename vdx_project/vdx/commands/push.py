@@ -1,10 +1,13 @@
 import os
 import logging
 import zipfile
-import io
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import json
-from vdx.utils import load_state, save_state, compute_checksum, is_ignored, load_ignore_patterns
+from vdx.utils import load_state, save_state, scan_files, load_ignore_patterns, store_object_file, load_object, prune_objects
+from vdx.planner import plan_mdl_deployment, component_key
+from vdx import profiler
 from vdx.api import make_vault_request, API_VERSION
 
 def _handle_push_response(response, context=""):
@@ -49,110 +52,252 @@ def _handle_push_response(response, context=""):
         logging.debug("[API DEBUG] Expected a JSON object with a 'responseStatus' key.")
         return False
 
-def push_mdl_changes(changes, deletions, dry_run=False):
+# Defaults for splitting MDL deployments; 0 disables the corresponding limit
+DEFAULT_MDL_BATCH_SIZE = 50
+DEFAULT_MDL_BATCH_BYTES = 1024 * 1024
+
+def _mdl_statement(path, action, content=None):
+    if action == "create":
+        return f"CREATE OR UPDATE COMPONENT \n{content}\n;\n"
+    parts = Path(path).parts
+    return f"DROP COMPONENT {parts[-2]}.\"{Path(parts[-1]).stem}\";\n"
+
+def _batch_mdl_statements(statements, max_count=0, max_bytes=0):
+    """Greedily splits statements into batches bounded by component count and script size."""
+    batches = []
+    batch, batch_bytes = [], 0
+    for statement in statements:
+        size = len(statement[2].encode('utf-8'))
+        full = (max_count > 0 and len(batch) >= max_count) or (max_bytes > 0 and batch_bytes + size > max_bytes)
+        if batch and full:
+            batches.append(batch)
+            batch, batch_bytes = [], 0
+        batch.append(statement)
+        batch_bytes += size
+    if batch:
+        batches.append(batch)
+    return batches
+
+def _mdl_statement_results(response):
+    """
+    Maps component names to success flags from the per-statement results of an
+    /mdl/execute response. Components missing from the response are not included.
+    """
+    try:
+        data = response.json()
+    except json.JSONDecodeError:
+        return {}
+    results = {}
+    for statement in data.get("statement_execution") or []:
+        component = statement.get("component")
+        if component:
+            results[component] = statement.get("execution_status") == "SUCCESS"
+    return results
+
+def _execute_mdl_batch(batch, context):
+    """Runs one batch through /mdl/execute. Returns {component: success}."""
+    endpoint = f"/api/{API_VERSION}/mdl/execute"
+    mdl_script = "".join(statement for _, _, statement in batch)
+    response = make_vault_request("POST", endpoint, data=mdl_script.encode('utf-8'), headers={'Content-Type': 'text/plain'})
+    batch_ok = _handle_push_response(response, context)
+    results = _mdl_statement_results(response)
+    return {component: results.get(component, batch_ok) for _, component, _ in batch}
+
+def push_mdl_changes(changes, deletions, dry_run=False, max_batch_size=DEFAULT_MDL_BATCH_SIZE, max_batch_bytes=DEFAULT_MDL_BATCH_BYTES, on_success=None, deleted_contents=None, jobs=1):
+    """
+    Deploys MDL changes following the dependency plan from vdx.planner: each layer
+    is split into batches of at most `max_batch_size` components and
+    `max_batch_bytes` of script, and the batches of one layer run up to `jobs` at a
+    time. Components whose dependencies failed are skipped. `deleted_contents`
+    ({path: last known mdl}) lets drops be ordered too. `on_success` is called with
+    the deployed paths after every batch. Returns all paths whose component deployed.
+    """
     if not changes and not deletions:
-        return 0
+        return []
 
     logging.info(f"Processing {len(changes)} MDL update(s) and {len(deletions)} deletion(s)...")
-    mdl_script = ""
+    changed_contents = {}
     for path in changes:
         with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-        mdl_script += f"CREATE OR UPDATE COMPONENT \n{content}\n;\n"
+            changed_contents[path] = f.read()
+    deleted_contents = deleted_contents or {}
+    with profiler.span("plan_mdl_deployment", components=len(changes) + len(deletions)):
+        steps, blockers = plan_mdl_deployment(changed_contents, {path: deleted_contents.get(path, "") for path in deletions})
 
-    for path in deletions:
-        parts = Path(path).parts
-        comp_type = parts[-2]
-        comp_name = Path(parts[-1]).stem
-        mdl_script += f"DROP COMPONENT {comp_type}.\"{comp_name}\";\n"
+    layers = []
+    for action, paths in steps:
+        statements = [(path, component_key(path), _mdl_statement(path, action, changed_contents.get(path))) for path in paths]
+        layers.append(_batch_mdl_statements(statements, max_batch_size, max_batch_bytes))
+    total_batches = sum(len(batches) for batches in layers)
+    total = len(changes) + len(deletions)
 
     if dry_run:
-        logging.info("[DRY RUN] MDL script to be executed:")
-        print(mdl_script)
-        return len(changes) + len(deletions)
+        logging.info(f"[DRY RUN] MDL script to be executed ({len(layers)} dependency layer(s)):")
+        batch_num = 0
+        for layer_num, batches in enumerate(layers, 1):
+            for batch in batches:
+                batch_num += 1
+                if total_batches > 1:
+                    print(f"-- Batch {batch_num}/{total_batches} (layer {layer_num}/{len(layers)})")
+                print("".join(statement for _, _, statement in batch))
+        return list(changes) + list(deletions)
 
-    endpoint = f"/api/{API_VERSION}/mdl/execute"
-    response = make_vault_request("POST", endpoint, data=mdl_script, headers={'Content-Type': 'text/plain'})
-    _handle_push_response(response, "MDL Push: ")
-    return len(changes) + len(deletions)
+    deployed = []
+    failed_paths = set()
+    failed = []
+    batch_num = 0
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        for batches in layers:
+            runnable = []
+            for batch in batches:
+                kept = []
+                for item in batch:
+                    path, component, _ = item
+                    if blockers.get(path, set()) & failed_paths:
+                        logging.error(f"Skipping {component}: a component it depends on failed to deploy.")
+                        failed_paths.add(path)
+                        failed.append(component)
+                    else:
+                        kept.append(item)
+                if kept:
+                    runnable.append(kept)
+
+            # Batches in one layer are independent, so they may run concurrently
+            futures = []
+            for batch in runnable:
+                batch_num += 1
+                context = f"MDL Push (batch {batch_num}/{total_batches}): " if total_batches > 1 else "MDL Push: "
+                futures.append((batch, executor.submit(_execute_mdl_batch, batch, context)))
+            for batch, future in futures:
+                results = future.result()
+                batch_deployed = []
+                for path, component, _ in batch:
+                    if results.get(component):
+                        batch_deployed.append(path)
+                    else:
+                        failed_paths.add(path)
+                        failed.append(component)
+                deployed.extend(batch_deployed)
+                if batch_deployed and on_success:
+                    on_success(batch_deployed)
+
+    logging.info(f"MDL: {len(deployed)} of {total} component(s) deployed in {batch_num} batch(es).")
+    if failed:
+        logging.error(f"MDL deployment failed for: {', '.join(failed)}")
+    return deployed
+
+def _run_uploads(tasks, jobs, label, on_success=None):
+    """
+    Runs independent upload tasks on a bounded worker pool. `tasks` is a list of
+    (key, callable) pairs whose callable returns True on success. `on_success` is
+    called on the calling thread with [key] as each task succeeds. Returns the keys
+    that succeeded, in task order, and logs an aggregated summary.
+    """
+    succeeded = []
+    failed = []
+    with ThreadPoolExecutor(max_workers=max(1, jobs)) as executor:
+        futures = [(key, executor.submit(task)) for key, task in tasks]
+        for key, future in futures:
+            try:
+                ok = future.result()
+            except Exception as e:
+                logging.error(f"{label}: unexpected error for {key}: {e}")
+                logging.debug("Traceback:", exc_info=True)
+                ok = False
+            (succeeded if ok else failed).append(key)
+            if ok and on_success:
+                on_success([key])
+
+    logging.info(f"{label}: {len(succeeded)} of {len(tasks)} succeeded.")
+    if failed:
+        logging.error(f"{label}: failed for {', '.join(failed)}")
+    return succeeded
 
-def push_java_sdk_changes(changes, deletions, dry_run=False):
+def _java_class_name(path):
+    rel_path = os.path.relpath(path, 'javasdk')
+    return Path(rel_path).with_suffix('').as_posix().replace('/', '.')
+
+def _push_java_class(path):
+    class_name = _java_class_name(path)
+    with open(path, 'r', encoding='utf-8') as f:
+        content = f.read()
+
+    logging.info(f"Pushing Java class: {class_name}")
+    endpoint = f"/api/{API_VERSION}/code/{class_name}"
+    response = make_vault_request("PUT", endpoint, data=content.encode('utf-8'), headers={'Content-Type': 'text/plain;charset=UTF-8'})
+    return _handle_push_response(response, f"Push {class_name}: ")
+
+def push_java_sdk_changes(changes, deletions, dry_run=False, jobs=1, on_success=None):
+    """Uploads changed Java classes, `jobs` at a time. Returns the paths pushed successfully."""
     if deletions:
         logging.warning(f"Deletion of Java SDK components is not supported via this API. Skipping {len(deletions)} deletion(s).")
     if not changes:
-        return 0
+        return []
 
     logging.info(f"Processing {len(changes)} Java SDK file update(s)...")
-    updated_count = 0
-    for path in changes:
-        rel_path = os.path.relpath(path, 'javasdk')
-        class_name = Path(rel_path).with_suffix('').as_posix().replace('/', '.')
-        
-        with open(path, 'r', encoding='utf-8') as f:
-            content = f.read()
-
-        logging.info(f"Pushing Java class: {class_name}")
-        if dry_run:
-            logging.info(f"[DRY RUN] Would push {path} to component {class_name}")
-            updated_count += 1
-            continue
+    if dry_run:
+        for path in changes:
+            logging.info(f"[DRY RUN] Would push {path} to component {_java_class_name(path)}")
+        return list(changes)
 
-        endpoint = f"/api/{API_VERSION}/code/{class_name}"
-        response = make_vault_request("PUT", endpoint, data=content.encode('utf-8'), headers={'Content-Type': 'text/plain;charset=UTF-8'})
-        if _handle_push_response(response, f"Push {class_name}: "):
-            updated_count += 1
-    return updated_count
+    tasks = [(path, lambda path=path: _push_java_class(path)) for path in changes]
+    return _run_uploads(tasks, jobs, "Java SDK", on_success)
 
-def push_custom_page_changes(changed_dirs, deleted_dirs, dry_run=False):
-    updated_count = 0
-    if changed_dirs:
-        logging.info(f"Processing {len(changed_dirs)} Custom Page distribution update(s)...")
-        for dist_dir in changed_dirs:
-            dist_name = os.path.basename(dist_dir)
-            logging.info(f"Re-packaging and pushing distribution: {dist_name}")
+def _push_distribution(dist_dir):
+    dist_name = os.path.basename(dist_dir)
+    logging.info(f"Re-packaging and pushing distribution: {dist_name}")
 
-            zip_buffer = io.BytesIO()
+    # Spill large archives to disk; zipping runs on the worker, overlapping other uploads
+    with tempfile.SpooledTemporaryFile(max_size=8 * 1024 * 1024) as zip_buffer:
+        with profiler.span("zip distribution", "cpu", distribution=dist_name) as span_args, profiler.cpu_profile():
             with zipfile.ZipFile(zip_buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
                 for root, _, files in os.walk(dist_dir):
                     for file in files:
                         file_path = os.path.join(root, file)
                         arcname = os.path.relpath(file_path, dist_dir)
                         zf.write(file_path, arcname)
-            zip_buffer.seek(0)
+            span_args["bytes"] = zip_buffer.tell()
+        zip_buffer.seek(0)
 
-            if dry_run:
-                logging.info(f"[DRY RUN] Would push zipped content of {dist_dir}")
-                updated_count += 1
-                continue
+        endpoint = f"/api/{API_VERSION}/uicode/distributions"
+        files = {'file': (f'{dist_name}.zip', zip_buffer, 'application/zip')}
+        response = make_vault_request("POST", endpoint, files=files)
+    return _handle_push_response(response, f"Push {dist_name}: ")
 
-            endpoint = f"/api/{API_VERSION}/uicode/distributions"
-            files = {'file': (f'{dist_name}.zip', zip_buffer, 'application/zip')}
-            response = make_vault_request("POST", endpoint, files=files)
-            if _handle_push_response(response, f"Push {dist_name}: "):
-                updated_count += 1
+def _delete_distribution(dist_dir):
+    dist_name = os.path.basename(dist_dir)
+    logging.info(f"Deleting distribution: {dist_name}")
+    endpoint = f"/api/{API_VERSION}/uicode/distributions/{dist_name}"
+    response = make_vault_request("DELETE", endpoint)
+    return _handle_push_response(response, f"Delete {dist_name}: ")
 
+def push_custom_page_changes(changed_dirs, deleted_dirs, dry_run=False, jobs=1, on_success=None):
+    """Uploads changed and deletes removed distributions, `jobs` at a time. Returns the dirs that succeeded."""
+    if changed_dirs:
+        logging.info(f"Processing {len(changed_dirs)} Custom Page distribution update(s)...")
     if deleted_dirs:
         logging.info(f"Processing {len(deleted_dirs)} Custom Page distribution deletion(s)...")
+    if not changed_dirs and not deleted_dirs:
+        return []
+
+    if dry_run:
+        for dist_dir in changed_dirs:
+            logging.info(f"[DRY RUN] Would push zipped content of {dist_dir}")
         for dist_dir in deleted_dirs:
-            dist_name = os.path.basename(dist_dir)
-            logging.info(f"Deleting distribution: {dist_name}")
-            if dry_run:
-                logging.info(f"[DRY RUN] Would delete distribution {dist_name}")
-                updated_count += 1
-                continue
-            
-            endpoint = f"/api/{API_VERSION}/uicode/distributions/{dist_name}"
-            response = make_vault_request("DELETE", endpoint)
-            if _handle_push_response(response, f"Delete {dist_name}: "):
-                updated_count += 1
-    return updated_count
+            logging.info(f"[DRY RUN] Would delete distribution {os.path.basename(dist_dir)}")
+        return list(changed_dirs) + list(deleted_dirs)
 
-def push_translation_changes(changes, dry_run=False):
+    tasks = [(d, lambda d=d: _push_distribution(d)) for d in changed_dirs]
+    tasks += [(d, lambda d=d: _delete_distribution(d)) for d in deleted_dirs]
+    return _run_uploads(tasks, jobs, "Custom Pages", on_success)
+
+def push_translation_changes(changes, dry_run=False, on_success=None):
+    """Imports changed translation files one by one. Returns the paths pushed successfully."""
     if not changes:
-        return 0
+        return []
     
     logging.info(f"Processing {len(changes)} translation file update(s)...")
-    updated_count = 0
+    pushed = []
     for path in changes:
         parts = Path(path).parts
         lang = parts[-2]
@@ -161,7 +306,7 @@ def push_translation_changes(changes, dry_run=False):
         logging.info(f"Pushing translations for {msg_type} in language '{lang}'")
         if dry_run:
             logging.info(f"[DRY RUN] Would push {path}")
-            updated_count += 1
+            pushed.append(path)
             continue
 
         endpoint = f"/api/{API_VERSION}/messages/actions/import"
@@ -170,8 +315,31 @@ def push_translation_changes(changes, dry_run=False):
             files = {'file': (os.path.basename(path), f.read(), 'text/csv')}
             response = make_vault_request("POST", endpoint, data=data, files=files)
             if _handle_push_response(response, f"Push {path}: "):
-                updated_count += 1
-    return updated_count
+                pushed.append(path)
+                if on_success:
+                    on_success([path])
+    return pushed
+
+def _commit_pushed(state, local_files, paths):
+    """
+    Advances `state` for paths that were pushed successfully. Each update is
+    journaled immediately, so an interrupted push only retries what is left.
+    Paths that no longer exist locally are untracked.
+    """
+    for path in paths:
+        if path in local_files:
+            # Pushed content becomes the new base for offline patch/diff
+            if not store_object_file(path, local_files[path]):
+                logging.warning(f"{path} changed while it was being pushed; it will be pushed again next time.")
+                continue
+            state.record(path, local_files[path], local_files.stats[path])
+        else:
+            state.forget(path)
+
+def _page_dir_paths(dist_dirs, state, local_files):
+    """Expands distribution directories to every tracked or local file they contain."""
+    prefixes = tuple(d + os.sep for d in dist_dirs)
+    return [p for p in set(state) | set(local_files) if p.startswith(prefixes)]
 
 def run_push(args):
     logging.info("Starting push process...")
@@ -181,16 +349,8 @@ def run_push(args):
     state = load_state()
     ignore_patterns = load_ignore_patterns()
     
-    local_files = {}
     tracked_dirs = ["components", "javasdk", "custom_pages", "translations"]
-    for directory in tracked_dirs:
-        if not os.path.exists(directory):
-            continue
-        for root, _, files in os.walk(directory):
-            for file in files:
-                path = os.path.join(root, file)
-                if not is_ignored(path, ignore_patterns):
-                    local_files[path] = compute_checksum(open(path, 'rb').read())
+    local_files = scan_files(tracked_dirs, state, ignore_patterns, verify=args.verify)
 
     new_or_changed_files = [path for path, checksum in local_files.items() if state.get(path) != checksum]
     deleted_files = [path for path in state.keys() if path not in local_files]
@@ -202,6 +362,7 @@ def run_push(args):
     java_deletions = [p for p in deleted_files if p.startswith("javasdk" + os.sep)]
     
     translation_changes = [p for p in new_or_changed_files if p.startswith("translations" + os.sep)]
+    translation_deletions = [p for p in deleted_files if p.startswith("translations" + os.sep)]
 
     changed_page_dirs = set()
     for path in new_or_changed_files:
@@ -218,21 +379,66 @@ def run_push(args):
             else:
                 changed_page_dirs.add(dist_dir)
 
+    def commit(paths):
+        if not args.dry_run:
+            _commit_pushed(state, local_files, paths)
+
     total_updated = 0
-    total_updated += push_mdl_changes(mdl_changes, mdl_deletions, args.dry_run)
-    total_updated += push_java_sdk_changes(java_changes, java_deletions, args.dry_run)
-    total_updated += push_custom_page_changes(list(changed_page_dirs), list(deleted_page_dirs), args.dry_run)
+    jobs = getattr(args, "jobs", 1)
+    with profiler.span("push_mdl_changes", changes=len(mdl_changes), deletions=len(mdl_deletions)):
+        mdl_deployed = push_mdl_changes(
+            mdl_changes, mdl_deletions, args.dry_run,
+            max_batch_size=getattr(args, "mdl_batch_size", DEFAULT_MDL_BATCH_SIZE),
+            max_batch_bytes=getattr(args, "mdl_batch_bytes", DEFAULT_MDL_BATCH_BYTES),
+            on_success=commit,
+            deleted_contents={path: (load_object(state[path]) or b"").decode('utf-8', 'replace') for path in mdl_deletions},
+            jobs=jobs,
+        )
+    total_updated += len(mdl_deployed)
+    with profiler.span("push_java_sdk_changes", changes=len(java_changes)):
+        java_pushed = push_java_sdk_changes(java_changes, java_deletions, args.dry_run, jobs=jobs, on_success=commit)
+    total_updated += len(java_pushed)
+    if java_deletions:
+        # Vault cannot delete classes through this API; stop tracking them so the warning is not repeated
+        commit(java_deletions)
+    with profiler.span("push_custom_page_changes", changes=len(changed_page_dirs), deletions=len(deleted_page_dirs)):
+        pages_pushed = push_custom_page_changes(
+            sorted(changed_page_dirs), sorted(deleted_page_dirs), args.dry_run, jobs=jobs,
+            on_success=lambda dirs: commit(_page_dir_paths(dirs, state, local_files)),
+        )
+    total_updated += len(pages_pushed)
+
+    failed_count = (
+        len(mdl_changes) + len(mdl_deletions) - len(mdl_deployed)
+        + len(java_changes) - len(java_pushed)
+        + len(changed_page_dirs) + len(deleted_page_dirs) - len(pages_pushed)
+    )
 
     if args.translations:
         logging.info("Including translations in push operation.")
-        total_updated += push_translation_changes(translation_changes, args.dry_run)
+        with profiler.span("push_translation_changes", changes=len(translation_changes)):
+            translations_pushed = push_translation_changes(translation_changes, args.dry_run, on_success=commit)
+        total_updated += len(translations_pushed)
+        failed_count += len(translation_changes) - len(translations_pushed)
     elif translation_changes:
         logging.info(f"Found {len(translation_changes)} translation change(s). Use --translations to include them in the push.")
+    if translation_deletions:
+        # There is no API to delete translations; stop tracking removed files
+        commit(translation_deletions)
 
     if not args.dry_run:
         logging.info("Updating local state...")
-        save_state(local_files)
-        logging.info("Push complete.")
+        # Refresh fingerprints of unchanged files so the next scan can skip hashing them
+        with profiler.span("save state", "io"):
+            for path, checksum in local_files.items():
+                if state.get(path) == checksum:
+                    state.stats[path] = local_files.stats[path]
+            save_state(state)
+            prune_objects(state)
+        if failed_count:
+            logging.warning(f"Push finished with {failed_count} change(s) not deployed. Run push again to retry them.")
+        else:
+            logging.info("Push complete.")
     else:
         logging.info("--- DRY RUN COMPLETE ---")
-        logging.info(f"Found {total_updated} total change(s) to push.")
\ No newline at end of file
+        logging.info(f"Found {total_updated} total change(s) to push.")
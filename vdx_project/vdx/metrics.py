@@ -0,0 +1,193 @@
+import os
+import json
+import math
+import time
+import logging
+import threading
+
+# Description of every metric vdx records, used for the Prometheus HELP lines
+METRIC_HELP = {
+    "vdx_api_requests_total": "Vault API requests by endpoint template, method and HTTP status.",
+    "vdx_api_request_duration_seconds": "Vault API request latency including retries.",
+    "vdx_api_bytes_sent_total": "Request body bytes sent to Vault.",
+    "vdx_api_bytes_received_total": "Response body bytes received from Vault.",
+    "vdx_api_retries_total": "Requests re-sent after HTTP 429/5xx or a connection error.",
+    "vdx_session_renewals_total": "Vault sessions renewed, by reason.",
+    "vdx_files_hashed_total": "Working tree files whose checksum was computed.",
+    "vdx_files_hash_skipped_total": "Working tree files whose checksum was reused because size/mtime were unchanged.",
+    "vdx_files_written_total": "Files written to the working tree.",
+    "vdx_state_updates_total": "Per-file state journal entries, by operation.",
+    "vdx_command_duration_seconds": "Wall time of the vdx command.",
+    "vdx_command_exit_code": "Exit code of the vdx command.",
+    "vdx_command_timestamp_seconds": "Unix time the vdx command finished.",
+}
+QUANTILES = (0.5, 0.95, 0.99)
+
+def _label_key(labels):
+    return tuple(sorted(labels.items()))
+
+def percentile(values, q):
+    """Nearest-rank percentile of `values`, or None if empty."""
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[max(0, math.ceil(q * len(ordered)) - 1)]
+
+class MetricsRegistry:
+    """
+    Thread-safe counters and histograms keyed by metric name and labels.
+    Histograms keep every observation so quantiles are exact; a run makes at most
+    a few hundred thousand requests, which is cheap to hold.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters = {}
+        self.histograms = {}
+
+    def inc(self, name, value=1, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+
+    def observe(self, name, value, **labels):
+        key = (name, _label_key(labels))
+        with self._lock:
+            self.histograms.setdefault(key, []).append(value)
+
+    def counter_total(self, name):
+        with self._lock:
+            return sum(v for (n, _), v in self.counters.items() if n == name)
+
+    def observations(self, name):
+        with self._lock:
+            return [v for (n, _), values in self.histograms.items() if n == name for v in values]
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    def snapshot(self):
+        """Returns copies of (counters, histograms) taken under the lock."""
+        with self._lock:
+            return dict(self.counters), {k: list(v) for k, v in self.histograms.items()}
+
+registry = MetricsRegistry()
+
+def inc(name, value=1, **labels):
+    registry.inc(name, value, **labels)
+
+def observe(name, value, **labels):
+    registry.observe(name, value, **labels)
+
+def _quantiles(values):
+    return {f"p{int(q * 100)}": percentile(values, q) for q in QUANTILES}
+
+def build_record(command, duration, exit_code):
+    """Summarises the registry into the JSON metrics record for one command run."""
+    counters, histograms = registry.snapshot()
+
+    endpoints = {}
+    for (name, labels), value in counters.items():
+        if name != "vdx_api_requests_total":
+            continue
+        labels = dict(labels)
+        key = f"{labels['method']} {labels['endpoint']}"
+        entry = endpoints.setdefault(key, {"count": 0, "errors": 0})
+        entry["count"] += value
+        if not str(labels["status"]).isdigit() or int(labels["status"]) >= 400:
+            entry["errors"] += value
+    for (name, labels), values in histograms.items():
+        if name == "vdx_api_request_duration_seconds":
+            labels = dict(labels)
+            key = f"{labels['method']} {labels['endpoint']}"
+            endpoints.setdefault(key, {"count": 0, "errors": 0}).update(_quantiles(values))
+
+    latencies = registry.observations("vdx_api_request_duration_seconds")
+    return {
+        "command": command,
+        "finished_at": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "duration_seconds": round(duration, 3),
+        "exit_code": exit_code,
+        "requests": {
+            "total": registry.counter_total("vdx_api_requests_total"),
+            "by_endpoint": dict(sorted(endpoints.items())),
+        },
+        "latency_seconds": dict(_quantiles(latencies), max=max(latencies) if latencies else None),
+        "bytes": {
+            "sent": registry.counter_total("vdx_api_bytes_sent_total"),
+            "received": registry.counter_total("vdx_api_bytes_received_total"),
+        },
+        "retries": registry.counter_total("vdx_api_retries_total"),
+        "session_renewals": registry.counter_total("vdx_session_renewals_total"),
+        "files": {
+            "hashed": registry.counter_total("vdx_files_hashed_total"),
+            "hash_skipped": registry.counter_total("vdx_files_hash_skipped_total"),
+            "written": registry.counter_total("vdx_files_written_total"),
+            "state_updates": registry.counter_total("vdx_state_updates_total"),
+        },
+    }
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+def _series(name, labels, value):
+    rendered = ",".join(f'{k}="{_escape(v)}"' for k, v in labels)
+    return f"{name}{{{rendered}}} {value}"
+
+def render_prometheus(command, duration, exit_code):
+    """Renders the registry in the Prometheus text exposition format (for the node_exporter textfile collector)."""
+    counters, histograms = registry.snapshot()
+    command_label = (("command", command),)
+    lines = []
+
+    by_name = {}
+    for (name, labels), value in counters.items():
+        by_name.setdefault(name, []).append((labels, value))
+    for name in sorted(by_name):
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, value in sorted(by_name[name]):
+            lines.append(_series(name, command_label + labels, value))
+
+    by_name = {}
+    for (name, labels), values in histograms.items():
+        by_name.setdefault(name, []).append((labels, values))
+    for name in sorted(by_name):
+        lines.append(f"# HELP {name} {METRIC_HELP.get(name, name)}")
+        lines.append(f"# TYPE {name} summary")
+        for labels, values in sorted(by_name[name]):
+            for q in QUANTILES:
+                lines.append(_series(name, command_label + labels + (("quantile", str(q)),), f"{percentile(values, q):.6f}"))
+            lines.append(_series(f"{name}_sum", command_label + labels, f"{sum(values):.6f}"))
+            lines.append(_series(f"{name}_count", command_label + labels, len(values)))
+
+    for name, value in (
+        ("vdx_command_duration_seconds", f"{duration:.3f}"),
+        ("vdx_command_exit_code", exit_code),
+        ("vdx_command_timestamp_seconds", f"{time.time():.0f}"),
+    ):
+        lines.append(f"# HELP {name} {METRIC_HELP[name]}")
+        lines.append(f"# TYPE {name} gauge")
+        lines.append(_series(name, command_label, value))
+    return "\n".join(lines) + "\n"
+
+def _write_atomic(path, text):
+    # Scrapers must never read a half-written file
+    tmp_path = f"{path}.tmp"
+    with open(tmp_path, 'w') as f:
+        f.write(text)
+    os.replace(tmp_path, path)
+
+def write_reports(metrics_dir, command, duration, exit_code):
+    """Writes vdx_<command>.json and vdx_<command>.prom into `metrics_dir`."""
+    try:
+        os.makedirs(metrics_dir, exist_ok=True)
+        json_path = os.path.join(metrics_dir, f"vdx_{command}.json")
+        prom_path = os.path.join(metrics_dir, f"vdx_{command}.prom")
+        _write_atomic(json_path, json.dumps(build_record(command, duration, exit_code), indent=2) + "\n")
+        _write_atomic(prom_path, render_prometheus(command, duration, exit_code))
+    except OSError as e:
+        logging.error(f"Could not write metrics to {metrics_dir}: {e}")
+        return
+    logging.debug(f"Metrics written to {json_path} and {prom_path}.")
@@ -0,0 +1,115 @@
+import re
+import logging
+from pathlib import Path
+
+# MDL attributes whose values name another component, mapped to the component type(s)
+# a bare value such as object('product__v') refers to. Values may also be written
+# qualified, e.g. picklist('Picklist.color__c'), which names the type directly.
+REFERENCE_ATTRIBUTES = {
+    "object": ("Object",),
+    "objects": ("Object",),
+    "reference_object": ("Object",),
+    "picklist": ("Picklist",),
+    "object_type": ("Objecttype",),
+    "doc_type": ("Doctype",),
+    "doctype": ("Doctype",),
+    "doctypes": ("Doctype",),
+    "lifecycle": ("Objectlifecycle", "Documentlifecycle"),
+    "lifecycles": ("Objectlifecycle", "Documentlifecycle"),
+    "workflow": ("Objectworkflow", "Workflow"),
+    "group": ("Group",),
+    "groups": ("Group",),
+    "page_layout": ("Pagelayout",),
+    "layout": ("Layout", "Pagelayout"),
+    "security_profile": ("Securityprofile",),
+    "permission_set": ("Permissionset",),
+    "tab": ("Tab",),
+    "report_type": ("Reporttype",),
+    "recordtrigger": ("Recordtrigger",),
+}
+_QUOTED_VALUE = r"'(?:[^'\\]|\\.)*'"
+# attribute('value') or attribute('value1', 'value2')
+MDL_ATTRIBUTE_PATTERN = re.compile(rf"\b([a-z_]+)\s*\(\s*({_QUOTED_VALUE}(?:\s*,\s*{_QUOTED_VALUE})*)\s*\)")
+_VALUE_PATTERN = re.compile(_QUOTED_VALUE)
+# A qualified value: Type.name, optionally followed by a sub-component (Object.product__v.name__v)
+QUALIFIED_REFERENCE_PATTERN = re.compile(r"^([A-Z][A-Za-z]*)\.([A-Za-z0-9_]+)(?:\.[A-Za-z0-9_]+)*$")
+
+def component_key(path):
+    """Returns the 'Type.name' key of a components/<Type>/<name>.mdl path."""
+    parts = Path(path).parts
+    return f"{parts[-2]}.{Path(parts[-1]).stem}"
+
+def parse_references(content):
+    """
+    Returns the set of 'Type.name' component keys an MDL definition may refer to.
+    A bare reference whose attribute maps to several types yields one key per type;
+    callers only keep the keys that name a known component.
+    """
+    references = set()
+    for attribute, values in MDL_ATTRIBUTE_PATTERN.findall(content or ""):
+        types = REFERENCE_ATTRIBUTES.get(attribute.lower())
+        for quoted in _VALUE_PATTERN.findall(values):
+            value = quoted[1:-1].strip()
+            qualified = QUALIFIED_REFERENCE_PATTERN.match(value)
+            if qualified:
+                references.add(f"{qualified.group(1)}.{qualified.group(2)}")
+            elif types and re.fullmatch(r"[A-Za-z0-9_]+", value):
+                references.update(f"{comp_type}.{value}" for comp_type in types)
+    return references
+
+def dependency_graph(contents):
+    """
+    Maps each path in `contents` ({path: mdl}) to the set of other paths in the
+    same change set that its MDL references. References to components outside
+    the change set are assumed to already exist in Vault and are ignored.
+    """
+    paths_by_key = {component_key(path): path for path in contents}
+    graph = {}
+    for path, content in contents.items():
+        own_key = component_key(path)
+        graph[path] = {
+            paths_by_key[key] for key in parse_references(content)
+            if key != own_key and key in paths_by_key
+        }
+    return graph
+
+def topological_layers(graph):
+    """
+    Splits `graph` ({node: dependencies}) into layers where every node only depends
+    on nodes in earlier layers. Nodes within a layer are independent of each other
+    and sorted for stable output. Nodes caught in a reference cycle form a final layer.
+    """
+    remaining = {node: set(deps) for node, deps in graph.items()}
+    layers = []
+    while remaining:
+        ready = sorted(node for node, deps in remaining.items() if not deps)
+        if not ready:
+            cycle = sorted(remaining)
+            logging.warning(f"Circular MDL references between {', '.join(component_key(p) for p in cycle)}; deploying them together.")
+            layers.append(cycle)
+            break
+        layers.append(ready)
+        for node in ready:
+            del remaining[node]
+        for deps in remaining.values():
+            deps.difference_update(ready)
+    return layers
+
+def plan_mdl_deployment(changed_contents, deleted_contents=None):
+    """
+    Plans an MDL deployment. Returns (steps, blockers) where `steps` is a list of
+    ("create" | "drop", [paths]) layers in execution order: creates with their
+    dependencies first, then drops with dependents first. `blockers` maps a path to
+    the paths whose failure must skip it.
+    """
+    create_graph = dependency_graph(changed_contents)
+    drop_graph = dependency_graph(deleted_contents or {})
+
+    steps = [("create", layer) for layer in topological_layers(create_graph)]
+    # A component can only be dropped once nothing references it any more
+    steps.extend(("drop", layer) for layer in reversed(topological_layers(drop_graph)))
+
+    blockers = {path: set(deps) for path, deps in create_graph.items()}
+    for path in drop_graph:
+        blockers[path] = {dependent for dependent, deps in drop_graph.items() if path in deps}
+    return steps, blockers
@@ -0,0 +1,126 @@
+import os
+import json
+import time
+import logging
+import threading
+import cProfile
+import pstats
+from contextlib import contextmanager
+
+# Recording is off unless enable() is called (vdx --profile), so spans cost next to nothing by default
+_enabled = False
+_origin = time.perf_counter()
+_events = []
+_thread_names = {}
+_lock = threading.Lock()
+
+_cpu_enabled = False
+_cpu_profiles = []
+_cpu_local = threading.local()
+
+def enable(cpu=False):
+    """Starts recording spans, and with `cpu` also cProfile samples of the hot paths."""
+    global _enabled, _origin, _cpu_enabled
+    with _lock:
+        _enabled = True
+        _cpu_enabled = cpu
+        _origin = time.perf_counter()
+        _events.clear()
+        _thread_names.clear()
+        _cpu_profiles.clear()
+
+def is_enabled():
+    return _enabled
+
+def _now_us():
+    return (time.perf_counter() - _origin) * 1_000_000
+
+def add_span(name, category, start_us, duration_us, **args):
+    """
+    Records a finished span in Chrome trace ('complete event') form. Extra keyword
+    arguments become the span's args, so they must not reuse the parameter names.
+    """
+    if not _enabled:
+        return
+    thread = threading.current_thread()
+    event = {
+        "name": name, "cat": category, "ph": "X",
+        "ts": round(start_us, 1), "dur": round(duration_us, 1),
+        "pid": os.getpid(), "tid": thread.ident, "args": args,
+    }
+    with _lock:
+        _events.append(event)
+        _thread_names.setdefault(thread.ident, thread.name)
+
+@contextmanager
+def span(name, category="phase", **args):
+    """
+    Times the enclosed block as a trace span. The yielded dict can be filled with
+    extra arguments (e.g. counts) that are only known at the end of the block.
+    """
+    if not _enabled:
+        yield args
+        return
+    start = _now_us()
+    try:
+        yield args
+    finally:
+        add_span(name, category, start, _now_us() - start, **args)
+
+def timestamp_us():
+    """Current trace timestamp, for spans recorded after the fact with add_span()."""
+    return _now_us()
+
+@contextmanager
+def cpu_profile():
+    """
+    Runs the enclosed block under cProfile when CPU profiling is on. Profiles from
+    all threads are merged when the trace is written; nested blocks are profiled once.
+    """
+    if not _cpu_enabled or getattr(_cpu_local, "active", False):
+        yield
+        return
+    profile = cProfile.Profile()
+    _cpu_local.active = True
+    try:
+        profile.enable()
+    except ValueError:
+        # Another profiler already owns this thread
+        _cpu_local.active = False
+        yield
+        return
+    try:
+        yield
+    finally:
+        profile.disable()
+        _cpu_local.active = False
+        with _lock:
+            _cpu_profiles.append(profile)
+
+def write_trace(path):
+    """Writes the recorded spans as a Chrome trace / Perfetto JSON file."""
+    with _lock:
+        events = list(_events)
+        names = dict(_thread_names)
+    metadata = [{"name": "process_name", "ph": "M", "pid": os.getpid(), "args": {"name": "vdx"}}]
+    metadata += [
+        {"name": "thread_name", "ph": "M", "pid": os.getpid(), "tid": tid, "args": {"name": name}}
+        for tid, name in names.items()
+    ]
+    with open(path, 'w') as f:
+        json.dump({"traceEvents": metadata + events, "displayTimeUnit": "ms"}, f)
+    logging.info(f"Profile trace with {len(events)} span(s) written to {path} (open in ui.perfetto.dev or chrome://tracing).")
+
+def write_cpu_profile(path):
+    """Merges the collected cProfile runs into one pstats file. Returns False if nothing was profiled."""
+    with _lock:
+        profiles = list(_cpu_profiles)
+    if not profiles:
+        logging.info("No CPU profile samples were collected (no hashing or zip work ran in-process).")
+        return False
+    stats = pstats.Stats(profiles[0])
+    for profile in profiles[1:]:
+        stats.add(profile)
+    stats.dump_stats(path)
+    logging.info(f"CPU profile written to {path} (inspect with: python -m pstats {path}).")
+    return True
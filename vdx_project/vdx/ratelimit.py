@@ -0,0 +1,96 @@
+import time
+import logging
+import threading
+
+# Vault counts burst-limited calls over a rolling 5 minute window
+BURST_WINDOW_SECONDS = 300
+# Fraction of the burst limit left untouched so other integrations on the same Vault keep working
+BURST_RESERVE = 0.1
+# Warn once when less than this fraction of the daily allowance is left
+DAILY_WARNING_RATIO = 0.05
+
+def _int_header(headers, name):
+    try:
+        return int(headers.get(name))
+    except (TypeError, ValueError):
+        return None
+
+class TokenBucket:
+    """
+    Client-side limiter fed by Vault's X-VaultAPI-BurstLimit* response headers.
+    Until Vault has reported a limit every call goes straight through. After
+    that the bucket holds the remaining burst allowance (never more than Vault
+    says is left) and refills at limit/window, so once the allowance runs low
+    callers are paced at the sustainable rate instead of being throttled.
+    """
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.capacity = None
+        self.rate = None
+        self.tokens = None
+        self._updated = time.monotonic()
+        self._daily_warned = False
+
+    def _refill(self, now):
+        if self.rate:
+            self.tokens = min(self.capacity, self.tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def _reserve(self):
+        return self.capacity * BURST_RESERVE
+
+    def acquire(self):
+        """Blocks until a call may be made within the burst allowance."""
+        while True:
+            with self._lock:
+                if self.capacity is None:
+                    return
+                now = time.monotonic()
+                self._refill(now)
+                available = self.tokens - self._reserve()
+                if available >= 1:
+                    self.tokens -= 1
+                    return
+                wait = (1 - available) / self.rate
+            logging.debug(f"[RATE] Burst allowance low, waiting {wait:.2f}s...")
+            time.sleep(wait)
+
+    def update(self, headers, status_code=None):
+        """Resynchronises the bucket with the limits reported on a Vault response."""
+        limit = _int_header(headers, "X-VaultAPI-BurstLimit")
+        remaining = _int_header(headers, "X-VaultAPI-BurstLimitRemaining")
+        daily_limit = _int_header(headers, "X-VaultAPI-DailyLimit")
+        daily_remaining = _int_header(headers, "X-VaultAPI-DailyLimitRemaining")
+
+        with self._lock:
+            if limit:
+                self.capacity = limit
+                self.rate = limit / BURST_WINDOW_SECONDS
+            if self.capacity is not None:
+                now = time.monotonic()
+                if self.tokens is None:
+                    self.tokens = self.capacity
+                    self._updated = now
+                self._refill(now)
+                if remaining is not None:
+                    # Other clients share the allowance, so Vault's count wins when it is lower
+                    self.tokens = min(self.tokens, remaining)
+                if status_code == 429:
+                    self.tokens = 0
+
+            warn_daily = (
+                daily_remaining is not None and daily_limit and not self._daily_warned
+                and daily_remaining < daily_limit * DAILY_WARNING_RATIO
+            )
+            if warn_daily:
+                self._daily_warned = True
+        if warn_daily:
+            logging.warning(f"Vault daily API limit nearly exhausted: {daily_remaining} of {daily_limit} calls left.")
+
+_bucket = TokenBucket()
+
+def acquire():
+    _bucket.acquire()
+
+def update(headers, status_code=None):
+    _bucket.update(headers, status_code)
@@ -0,0 +1,762 @@
+"""
+Offline stand-in for the Vault REST API endpoints used by vdx.
+
+Run it with `python -m vdx.simulator` (or `vdx-simulator`) and log in with
+`vdx login -v http://127.0.0.1:8800 -u sim -p sim`. Every request can be slowed
+down per endpoint, answered with injected 429/5xx errors, and sessions expire
+after a configurable idle time, so retries and renewals can be exercised
+without touching a real Vault.
+"""
+import io
+import re
+import json
+import time
+import uuid
+import random
+import hashlib
+import logging
+import argparse
+import threading
+import zipfile
+from datetime import datetime, timezone
+from email.parser import BytesParser
+from email.policy import default as default_policy
+from http.server import BaseHTTPRequestHandler, HTTPServer
+from socketserver import ThreadingMixIn
+from urllib.parse import urlsplit, parse_qs
+
+DEFAULT_PORT = 8800
+DEFAULT_PAGE_SIZE = 1000
+DEFAULT_ERROR_STATUSES = (429, 500, 502, 503)
+BURST_WINDOW_SECONDS = 300
+
+METADATA_TYPES = ["Picklist", "Object", "Objecttype", "Doctype", "Docfield", "Workflow"]
+CODE_TYPE = "Code"
+TRANSLATION_MESSAGE_TYPES = ['field_labels__sys', 'system_messages__sys', 'notification_template_messages__sys', 'user_account_messages__sys']
+
+def _now(offset_seconds=0):
+    return datetime.fromtimestamp(time.time() - offset_seconds, timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+class SyntheticVault:
+    """In-memory Vault contents: MDL components, Java classes, page distributions and translations."""
+    def __init__(self):
+        self.lock = threading.RLock()
+        self.components = {}      # (type, name) -> {"mdl": str, "modified": str}
+        self.java_classes = {}    # class name -> source
+        self.distributions = {}   # name -> zip bytes
+        self.languages = ["en"]
+        self.messages = {}        # (msg_type, lang) -> csv bytes
+        self.packages = {}        # package id -> vpk bytes
+
+    def set_component(self, comp_type, name, mdl, modified=None):
+        with self.lock:
+            self.components[(comp_type, name)] = {"mdl": mdl, "modified": modified or _now()}
+
+    def set_java_class(self, class_name, source, modified=None):
+        with self.lock:
+            self.java_classes[class_name] = source
+            self.components[(CODE_TYPE, class_name)] = {"mdl": "", "modified": modified or _now()}
+
+    def component_records(self):
+        with self.lock:
+            return [
+                {
+                    "component_type__v": comp_type,
+                    "component_name__v": name,
+                    "mdl_definition__v": entry["mdl"],
+                    "modified_date__v": entry["modified"],
+                }
+                for (comp_type, name), entry in sorted(self.components.items())
+            ]
+
+def _component_mdl(comp_type, index, rng, picklists, objects):
+    name = f"{comp_type.lower()}_{index}__c"
+    lines = [f"RECREATE {comp_type} {name} (", f"   label('{comp_type} {index}'),", "   active(true)"]
+    if comp_type == "Picklist":
+        for value in range(rng.randint(3, 8)):
+            lines[-1] += ","
+            lines.append(f"   Picklistentry value_{value}__c(value('Value {value}'), order({value}), active(true))")
+    elif comp_type == "Object":
+        for field in range(rng.randint(2, 6)):
+            lines[-1] += ","
+            if picklists and rng.random() < 0.5:
+                lines.append(f"   Field field_{field}__c(label('Field {field}'), type('Picklist'), picklist('Picklist.{rng.choice(picklists)}'))")
+            else:
+                lines.append(f"   Field field_{field}__c(label('Field {field}'), type('String'), max_length({rng.randint(10, 255)}))")
+    elif objects:
+        lines[-1] += ","
+        lines.append(f"   object('{rng.choice(objects)}')")
+    lines.append(");")
+    return name, "\n".join(lines)
+
+def _java_source(package, class_name, rng):
+    methods = "\n".join(
+        f"    public int method{i}(int value) {{\n        return value * {rng.randint(2, 99)} + {i};\n    }}\n"
+        for i in range(rng.randint(5, 30))
+    )
+    return f"package {package};\n\nimport com.veeva.vault.sdk.api.core.*;\n\npublic class {class_name} {{\n{methods}}}\n"
+
+def _random_bytes(rng, size):
+    """Deterministic bytes from `rng` (Random.randbytes is Python 3.9+)."""
+    return rng.getrandbits(size * 8).to_bytes(size, "little") if size else b""
+
+def _distribution_zip(name, total_bytes, files, rng):
+    buffer = io.BytesIO()
+    per_file = max(1, total_bytes // max(1, files))
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr("distribution-manifest.json", json.dumps({"name": name, "pages": [{"name": name, "file": "dist/index.js"}]}))
+        for i in range(files):
+            # Random bytes keep the archive close to the requested size after compression
+            zf.writestr(f"dist/chunk_{i}.js", _random_bytes(rng, per_file))
+    return buffer.getvalue()
+
+def generate_vault(components=100, java_classes=10, pages=2, page_bytes=256 * 1024, page_files=4, languages=("en",), seed=0):
+    """
+    Builds a SyntheticVault of the requested size. Components are spread over
+    METADATA_TYPES and reference each other (Object fields use Picklists, other
+    types point at Objects) so deployments have real dependencies.
+    """
+    rng = random.Random(seed)
+    vault = SyntheticVault()
+    vault.languages = list(languages)
+
+    picklists, objects = [], []
+    counts = {t: 0 for t in METADATA_TYPES}
+    for i in range(components):
+        comp_type = METADATA_TYPES[i % len(METADATA_TYPES)]
+        name, mdl = _component_mdl(comp_type, counts[comp_type], rng, picklists, objects)
+        counts[comp_type] += 1
+        # Spread modified dates over the past year so incremental pulls see a realistic history
+        vault.set_component(comp_type, name, mdl, modified=_now(rng.randint(3600, 365 * 86400)))
+        if comp_type == "Picklist":
+            picklists.append(name)
+        elif comp_type == "Object":
+            objects.append(name)
+
+    for i in range(java_classes):
+        package = f"com.veeva.vault.custom.module{i % 5}"
+        class_name = f"Generated{i}"
+        vault.set_java_class(f"{package}.{class_name}", _java_source(package, class_name, rng), modified=_now(rng.randint(3600, 365 * 86400)))
+
+    for i in range(pages):
+        name = f"page_{i}__c"
+        vault.distributions[name] = _distribution_zip(name, page_bytes, page_files, rng)
+
+    for lang in vault.languages:
+        for msg_type in TRANSLATION_MESSAGE_TYPES:
+            rows = "\n".join(f"key_{k},Text {k} ({lang})" for k in range(20))
+            vault.messages[(msg_type, lang)] = f"key,text\n{rows}\n".encode('utf-8')
+    return vault
+
+# --- VQL -------------------------------------------------------------------
+
+_VQL_TOKEN = re.compile(r"\s*(?:('(?:\\.|[^'\\])*')|(>=|<=|!=|[=<>(),*])|([A-Za-z_][A-Za-z0-9_.]*))")
+
+class VqlError(ValueError):
+    pass
+
+def _tokenize(query):
+    tokens, pos = [], 0
+    query = query.strip()
+    while pos < len(query):
+        m = _VQL_TOKEN.match(query, pos)
+        if not m or m.end() == pos:
+            raise VqlError(f"Unexpected input at position {pos}")
+        string, symbol, word = m.groups()
+        if string is not None:
+            tokens.append(("str", re.sub(r"\\(.)", r"\1", string[1:-1])))
+        elif symbol is not None:
+            tokens.append(("sym", symbol))
+        else:
+            tokens.append(("word", word))
+        pos = m.end()
+    return tokens
+
+class _VqlParser:
+    """Recursive-descent parser for the subset of VQL that vdx sends."""
+    def __init__(self, query):
+        self.tokens = _tokenize(query)
+        self.pos = 0
+
+    def _peek(self, offset=0):
+        index = self.pos + offset
+        return self.tokens[index] if index < len(self.tokens) else (None, None)
+
+    def _keyword(self, word):
+        kind, value = self._peek()
+        if kind == "word" and value.upper() == word:
+            self.pos += 1
+            return True
+        return False
+
+    def _expect(self, kind, value=None):
+        token = self._peek()
+        if token[0] != kind or (value is not None and token[1] != value):
+            raise VqlError(f"Expected {value or kind}, got {token[1]!r}")
+        self.pos += 1
+        return token[1]
+
+    def parse(self):
+        if not self._keyword("SELECT"):
+            raise VqlError("Query must start with SELECT")
+        fields = [self._expect("word")]
+        while self._peek() == ("sym", ","):
+            self.pos += 1
+            fields.append(self._expect("word"))
+        if not self._keyword("FROM"):
+            raise VqlError("Missing FROM")
+        source = self._expect("word")
+        condition = self._or() if self._keyword("WHERE") else (lambda record: True)
+        if self.pos != len(self.tokens):
+            raise VqlError(f"Unexpected token {self._peek()[1]!r}")
+        return fields, source, condition
+
+    def _or(self):
+        terms = [self._and()]
+        while self._keyword("OR"):
+            terms.append(self._and())
+        return terms[0] if len(terms) == 1 else (lambda record: any(t(record) for t in terms))
+
+    def _and(self):
+        factors = [self._not()]
+        while self._keyword("AND"):
+            factors.append(self._not())
+        return factors[0] if len(factors) == 1 else (lambda record: all(f(record) for f in factors))
+
+    def _not(self):
+        if self._keyword("NOT"):
+            inner = self._not()
+            return lambda record: not inner(record)
+        if self._peek() == ("sym", "("):
+            self.pos += 1
+            inner = self._or()
+            self._expect("sym", ")")
+            return inner
+        return self._comparison()
+
+    def _comparison(self):
+        field = self._expect("word")
+        if self._keyword("CONTAINS") or self._keyword("IN"):
+            self._expect("sym", "(")
+            values = {self._expect("str")}
+            while self._peek() == ("sym", ","):
+                self.pos += 1
+                values.add(self._expect("str"))
+            self._expect("sym", ")")
+            return lambda record: record.get(field) in values
+        negate = self._keyword("NOT")
+        if self._keyword("LIKE"):
+            pattern = re.compile("".join(".*" if c == "%" else re.escape(c) for c in self._expect("str")), re.DOTALL)
+            return lambda record: bool(pattern.fullmatch(record.get(field) or "")) != negate
+        if negate:
+            raise VqlError("NOT must be followed by LIKE")
+        op = self._expect("sym")
+        value = self._expect("str")
+        compare = {
+            "=": lambda a: a == value, "!=": lambda a: a != value,
+            ">=": lambda a: a >= value, "<=": lambda a: a <= value,
+            ">": lambda a: a > value, "<": lambda a: a < value,
+        }.get(op)
+        if compare is None:
+            raise VqlError(f"Unsupported operator {op}")
+        return lambda record: record.get(field) is not None and compare(record.get(field))
+
+def run_vql(query, records_by_source):
+    """Evaluates `query` against {source: [records]}. Returns the projected records."""
+    fields, source, condition = _VqlParser(query).parse()
+    if source not in records_by_source:
+        raise VqlError(f"Unknown object {source}")
+    return [{f: record.get(f) for f in fields} for record in records_by_source[source] if condition(record)]
+
+# --- HTTP server -----------------------------------------------------------
+
+def _mdl_statements(script):
+    """Splits an /mdl/execute script into (action, type, name, mdl) tuples."""
+    statements = []
+    for block in re.split(r"(?=CREATE OR UPDATE COMPONENT|DROP COMPONENT)", script):
+        block = block.strip()
+        if block.startswith("DROP COMPONENT"):
+            m = re.match(r'DROP COMPONENT\s+(\w+)\.\"?(\w+)\"?', block)
+            if m:
+                statements.append(("drop", m.group(1), m.group(2), None))
+        elif block.startswith("CREATE OR UPDATE COMPONENT"):
+            mdl = block[len("CREATE OR UPDATE COMPONENT"):].strip()
+            if mdl.endswith(";"):
+                mdl = mdl[:-1].rstrip()
+            m = re.match(r"(?:RECREATE|CREATE|ALTER)\s+(\w+)\s+(\w+)", mdl)
+            statements.append(("create", m.group(1), m.group(2), mdl) if m else ("invalid", None, None, mdl))
+    return statements
+
+def _parse_multipart(content_type, body):
+    message = BytesParser(policy=default_policy).parsebytes(
+        b"Content-Type: " + content_type.encode('latin-1') + b"\r\n\r\n" + body
+    )
+    fields, files = {}, {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        payload = part.get_payload(decode=True) or b""
+        if part.get_filename():
+            files[name] = (part.get_filename(), payload)
+        else:
+            fields[name] = payload.decode('utf-8')
+    return fields, files
+
+class VaultSimulator(ThreadingMixIn, HTTPServer):
+    """
+    Threaded HTTP server answering vdx's Vault API calls from a SyntheticVault.
+
+    `latency` maps endpoint labels (auth, metadata, query, code, distributions,
+    mdl, messages, jobs, vpackages) or "*" to seconds added to every response.
+    `error_rate` maps the same labels to the probability of answering with one
+    of `error_statuses` instead. Sessions expire after `session_timeout` idle
+    seconds. With `burst_limit`, rate-limit headers are sent and calls beyond the
+    limit within the burst window get HTTP 429.
+    """
+    daemon_threads = True
+
+    def __init__(self, vault=None, host="127.0.0.1", port=0, latency=None, error_rate=None,
+                 error_statuses=DEFAULT_ERROR_STATUSES, session_timeout=None, page_size=DEFAULT_PAGE_SIZE,
+                 burst_limit=0, job_duration=0.0, seed=None):
+        super().__init__((host, port), _SimulatorHandler)
+        self.vault = vault or generate_vault()
+        self.latency = dict(latency or {})
+        self.error_rate = dict(error_rate or {})
+        self.error_statuses = tuple(error_statuses)
+        self.session_timeout = session_timeout
+        self.page_size = page_size
+        self.burst_limit = burst_limit
+        self.job_duration = job_duration
+        self.random = random.Random(seed)
+        self.lock = threading.Lock()
+        self.sessions = {}        # session id -> last used (monotonic)
+        self.cursors = {}         # cursor id -> records
+        self.jobs = {}            # job id -> {"ready_at": float, "data": dict}
+        self.calls = []           # monotonic timestamps within the burst window
+        self.stats = {"requests": {}, "errors_injected": 0, "bytes_in": 0, "bytes_out": 0}
+        self.catalog_etag = uuid.uuid4().hex
+        self._thread = None
+
+    @property
+    def url(self):
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def start(self):
+        """Serves in a background thread. Returns self."""
+        self._thread = threading.Thread(target=self.serve_forever, name="vault-simulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def expire_sessions(self):
+        with self.lock:
+            self.sessions.clear()
+
+    def reset_stats(self):
+        with self.lock:
+            self.stats = {"requests": {}, "errors_injected": 0, "bytes_in": 0, "bytes_out": 0}
+
+    def _chance(self, label):
+        rate = self.error_rate.get(label, self.error_rate.get("*", 0))
+        with self.lock:
+            return rate and self.random.random() < rate
+
+    def _burst(self):
+        """Registers a call. Returns (remaining, allowed)."""
+        now = time.monotonic()
+        with self.lock:
+            self.calls = [t for t in self.calls if now - t < BURST_WINDOW_SECONDS]
+            allowed = len(self.calls) < self.burst_limit
+            if allowed:
+                self.calls.append(now)
+            return max(0, self.burst_limit - len(self.calls)), allowed
+
+    def check_session(self, session_id):
+        now = time.monotonic()
+        with self.lock:
+            last_used = self.sessions.get(session_id)
+            if last_used is None:
+                return False
+            if self.session_timeout is not None and now - last_used > self.session_timeout:
+                del self.sessions[session_id]
+                return False
+            self.sessions[session_id] = now
+            return True
+
+    def new_session(self):
+        session_id = uuid.uuid4().hex
+        with self.lock:
+            self.sessions[session_id] = time.monotonic()
+        return session_id
+
+    def add_job(self, data):
+        with self.lock:
+            job_id = str(len(self.jobs) + 1)
+            self.jobs[job_id] = {"ready_at": time.monotonic() + self.job_duration, "data": dict(data, id=job_id)}
+        return job_id
+
+class _SimulatorHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    server_version = "VaultSimulator/1.0"
+
+    ROUTES = [
+        ("POST", r"/api/[^/]+/auth", "auth", "_auth"),
+        ("GET", r"/api/[^/]+/metadata/components", "metadata", "_metadata"),
+        ("POST", r"/api/[^/]+/query/components", "query", "_query_components"),
+        ("GET", r"/api/[^/]+/query/components/cursor/(?P<cursor>[^/]+)", "query", "_query_page"),
+        ("POST", r"/api/[^/]+/query", "query", "_query"),
+        ("GET", r"/api/[^/]+/code/(?P<name>[^/]+)", "code", "_get_code"),
+        ("PUT", r"/api/[^/]+/code/(?P<name>[^/]+)", "code", "_put_code"),
+        ("GET", r"/api/[^/]+/uicode/distributions", "distributions", "_list_distributions"),
+        ("GET", r"/api/[^/]+/uicode/distributions/(?P<name>[^/]+)/code", "distributions", "_get_distribution"),
+        ("POST", r"/api/[^/]+/uicode/distributions", "distributions", "_post_distribution"),
+        ("DELETE", r"/api/[^/]+/uicode/distributions/(?P<name>[^/]+)", "distributions", "_delete_distribution"),
+        ("POST", r"/api/[^/]+/mdl/execute", "mdl", "_mdl_execute"),
+        ("POST", r"/api/[^/]+/messages/(?P<msg_type>[^/]+)/language/(?P<lang>[^/]+)/actions/export", "messages", "_export_messages"),
+        ("GET", r"/api/[^/]+/messages/(?P<msg_type>[^/]+)/language/(?P<lang>[^/]+)/file", "messages", "_messages_file"),
+        ("POST", r"/api/[^/]+/messages/actions/import", "messages", "_import_messages"),
+        ("GET", r"/api/[^/]+/services/jobs/(?P<job_id>[^/]+)", "jobs", "_job_status"),
+        ("POST", r"/api/[^/]+/vpackages", "vpackages", "_import_package"),
+        ("POST", r"/api/[^/]+/vpackages/(?P<package_id>[^/]+)/actions/validate", "vpackages", "_validate_package"),
+    ]
+
+    def log_message(self, format, *args):
+        logging.debug(f"[SIM] {self.address_string()} {format % args}")
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_PUT(self):
+        self._dispatch("PUT")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+    # -- plumbing --
+
+    def _send(self, status, body, content_type="application/json", headers=None):
+        if isinstance(body, (dict, list)):
+            body = json.dumps(body).encode('utf-8')
+        elif isinstance(body, str):
+            body = body.encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", content_type)
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        for name, value in self._limit_headers.items():
+            self.send_header(name, value)
+        self.end_headers()
+        if self.command != "HEAD":
+            self.wfile.write(body)
+        with self.server.lock:
+            self.server.stats["bytes_out"] += len(body)
+
+    def _failure(self, error_type, message, status=200):
+        self._send(status, {"responseStatus": "FAILURE", "errors": [{"type": error_type, "message": message}]})
+
+    def _form(self):
+        content_type = self.headers.get("Content-Type", "")
+        if content_type.startswith("multipart/form-data"):
+            return _parse_multipart(content_type, self.body)
+        if content_type.startswith("application/x-www-form-urlencoded"):
+            return {k: v[0] for k, v in parse_qs(self.body.decode('utf-8')).items()}, {}
+        return {}, {}
+
+    def _dispatch(self, method):
+        server = self.server
+        length = int(self.headers.get("Content-Length") or 0)
+        self.body = self.rfile.read(length) if length else b""
+        self._limit_headers = {}
+        parts = urlsplit(self.path)
+        self.query = {k: v[0] for k, v in parse_qs(parts.query).items()}
+        self.api_version = parts.path.split("/")[2] if parts.path.startswith("/api/") else "v1"
+
+        for route_method, pattern, label, handler in self.ROUTES:
+            m = re.fullmatch(pattern, parts.path)
+            if route_method == method and m:
+                break
+        else:
+            self._failure("MALFORMED_URL", f"No simulated endpoint for {method} {parts.path}", status=404)
+            return
+
+        with server.lock:
+            server.stats["requests"][label] = server.stats["requests"].get(label, 0) + 1
+            server.stats["bytes_in"] += length
+
+        delay = server.latency.get(label, server.latency.get("*", 0))
+        if delay:
+            time.sleep(delay)
+
+        if server.burst_limit:
+            remaining, allowed = server._burst()
+            self._limit_headers = {
+                "X-VaultAPI-BurstLimit": str(server.burst_limit),
+                "X-VaultAPI-BurstLimitRemaining": str(remaining),
+            }
+            if not allowed:
+                self._send(429, {"responseStatus": "FAILURE", "errors": [{"type": "API_LIMIT_EXCEEDED", "message": "Burst limit exceeded."}]},
+                           headers={"Retry-After": "1"})
+                return
+
+        if server._chance(label):
+            status = server.random.choice(server.error_statuses)
+            with server.lock:
+                server.stats["errors_injected"] += 1
+            self._send(status, {"responseStatus": "FAILURE", "errors": [{"type": "INJECTED_FAULT", "message": f"Simulated HTTP {status}."}]},
+                       headers={"Retry-After": "1"} if status in (429, 503) else None)
+            return
+
+        if label != "auth" and not server.check_session(self.headers.get("Authorization")):
+            self._failure("INVALID_SESSION_ID", "Invalid or expired session ID.", status=401)
+            return
+
+        getattr(self, handler)(**m.groupdict())
+
+    # -- endpoints --
+
+    def _auth(self):
+        fields, _ = self._form()
+        if not fields.get("username") or not fields.get("password"):
+            self._failure("USERNAME_OR_PASSWORD_INCORRECT", "Authentication failed.")
+            return
+        self._send(200, {"responseStatus": "SUCCESS", "sessionId": self.server.new_session()})
+
+    def _metadata(self):
+        etag = f'"{self.server.catalog_etag}"'
+        if self.headers.get("If-None-Match") == etag:
+            self._send(304, b"", headers={"ETag": etag})
+            return
+        data = [{"name": t, "class": "metadata"} for t in METADATA_TYPES] + [{"name": CODE_TYPE, "class": "code"}]
+        self._send(200, {"responseStatus": "SUCCESS", "data": data}, headers={"ETag": etag})
+
+    def _page(self, records, cursor, offset):
+        page_size = self.server.page_size
+        page = records[offset:offset + page_size]
+        details = {"size": len(page), "total": len(records), "pageoffset": offset, "pagesize": page_size}
+        if offset + page_size < len(records):
+            details["next_page"] = f"/api/{self.api_version}/query/components/cursor/{cursor}?offset={offset + page_size}"
+        else:
+            with self.server.lock:
+                self.server.cursors.pop(cursor, None)
+        self._send(200, {"responseStatus": "SUCCESS", "responseDetails": details, "data": page})
+
+    def _query_components(self):
+        fields, _ = self._form()
+        try:
+            records = run_vql(fields.get("q", ""), {"vault_component__v": self.server.vault.component_records()})
+        except VqlError as e:
+            self._failure("MALFORMED_QUERY", str(e))
+            return
+        cursor = uuid.uuid4().hex
+        with self.server.lock:
+            self.server.cursors[cursor] = records
+        self._page(records, cursor, 0)
+
+    def _query_page(self, cursor):
+        with self.server.lock:
+            records = self.server.cursors.get(cursor)
+        if records is None:
+            self._failure("INVALID_DATA", "Unknown or expired query cursor.")
+            return
+        self._page(records, cursor, int(self.query.get("offset", 0)))
+
+    def _query(self):
+        fields, _ = self._form()
+        languages = [{"admin_key__sys": lang} for lang in self.server.vault.languages]
+        try:
+            records = run_vql(fields.get("q", ""), {"language__sys": languages})
+        except VqlError as e:
+            self._failure("MALFORMED_QUERY", str(e))
+            return
+        self._send(200, {"responseStatus": "SUCCESS", "responseDetails": {"size": len(records), "total": len(records)}, "data": records})
+
+    def _get_code(self, name):
+        source = self.server.vault.java_classes.get(name)
+        if source is None:
+            self._failure("INVALID_DATA", f"Class {name} not found.")
+            return
+        self._send(200, source, content_type="text/plain;charset=UTF-8")
+
+    def _put_code(self, name):
+        self.server.vault.set_java_class(name, self.body.decode('utf-8'))
+        self._send(200, {"responseStatus": "SUCCESS", "responseMessage": f"Deployed {name}."})
+
+    def _list_distributions(self):
+        with self.server.vault.lock:
+            data = [
+                {"name": name, "checksum": hashlib.md5(content).hexdigest(), "size": len(content)}
+                for name, content in sorted(self.server.vault.distributions.items())
+            ]
+        self._send(200, {"responseStatus": "SUCCESS", "data": data})
+
+    def _get_distribution(self, name):
+        content = self.server.vault.distributions.get(name)
+        if content is None:
+            self._failure("INVALID_DATA", f"Distribution {name} not found.")
+            return
+        self._send(200, content, content_type="application/zip")
+
+    def _post_distribution(self):
+        _, files = self._form()
+        if "file" not in files:
+            self._failure("PARAMETER_REQUIRED", "Missing required parameter [file].")
+            return
+        filename, content = files["file"]
+        name = filename[:-len(".zip")] if filename.endswith(".zip") else filename
+        try:
+            zipfile.ZipFile(io.BytesIO(content)).testzip()
+        except zipfile.BadZipFile:
+            self._failure("INVALID_DATA", "Distribution is not a valid zip file.")
+            return
+        with self.server.vault.lock:
+            self.server.vault.distributions[name] = content
+        self._send(200, {"responseStatus": "SUCCESS", "data": {"name": name}})
+
+    def _delete_distribution(self, name):
+        with self.server.vault.lock:
+            removed = self.server.vault.distributions.pop(name, None)
+        if removed is None:
+            self._failure("INVALID_DATA", f"Distribution {name} not found.")
+            return
+        self._send(200, {"responseStatus": "SUCCESS"})
+
+    def _mdl_execute(self):
+        vault = self.server.vault
+        results = []
+        for action, comp_type, name, mdl in _mdl_statements(self.body.decode('utf-8')):
+            if action == "invalid":
+                results.append({"component": None, "execution_status": "FAILURE", "message": "Could not parse MDL statement."})
+                continue
+            component = f"{comp_type}.{name}"
+            if action == "drop":
+                with vault.lock:
+                    removed = vault.components.pop((comp_type, name), None)
+                status = "SUCCESS" if removed is not None else "FAILURE"
+            else:
+                vault.set_component(comp_type, name, mdl)
+                status = "SUCCESS"
+            results.append({"component": component, "execution_status": status})
+
+        failed = any(r["execution_status"] != "SUCCESS" for r in results)
+        self._send(200, {
+            "responseStatus": "FAILURE" if failed else "SUCCESS",
+            "script_execution": {"statement_count": len(results), "failures": sum(r["execution_status"] != "SUCCESS" for r in results)},
+            "statement_execution": results,
+        })
+
+    def _export_messages(self, msg_type, lang):
+        if (msg_type, lang) not in self.server.vault.messages:
+            self._send(200, {"responseStatus": "SUCCESS"})
+            return
+        href = f"/api/{self.api_version}/messages/{msg_type}/language/{lang}/file"
+        job_id = self.server.add_job({"status": "SUCCESS", "links": [{"rel": "content", "href": href}]})
+        self._send(200, {"responseStatus": "SUCCESS", "data": {"jobId": job_id}})
+
+    def _messages_file(self, msg_type, lang):
+        content = self.server.vault.messages.get((msg_type, lang))
+        if content is None:
+            self._failure("INVALID_DATA", "No messages exported.")
+            return
+        self._send(200, content, content_type="text/csv")
+
+    def _import_messages(self):
+        fields, files = self._form()
+        if "file" not in files:
+            self._failure("PARAMETER_REQUIRED", "Missing required parameter [file].")
+            return
+        key = (fields.get("message_type"), fields.get("language"))
+        with self.server.vault.lock:
+            self.server.vault.messages[key] = files["file"][1]
+        self._send(200, {"responseStatus": "SUCCESS"})
+
+    def _job_status(self, job_id):
+        job = self.server.jobs.get(job_id)
+        if job is None:
+            self._failure("INVALID_DATA", f"Job {job_id} not found.")
+            return
+        data = dict(job["data"])
+        if time.monotonic() < job["ready_at"]:
+            data["status"] = "RUNNING"
+        self._send(200, {"responseStatus": "SUCCESS", "data": data})
+
+    def _import_package(self):
+        _, files = self._form()
+        if "file" not in files:
+            self._failure("PARAMETER_REQUIRED", "Missing required parameter [file].")
+            return
+        package_id = f"0PI{uuid.uuid4().hex[:12].upper()}"
+        with self.server.vault.lock:
+            self.server.vault.packages[package_id] = files["file"][1]
+        job_id = self.server.add_job({"status": "SUCCESS", "artifacts": {"vault_package__v": [package_id]}})
+        self._send(200, {"responseStatus": "SUCCESS", "job_id": job_id})
+
+    def _validate_package(self, package_id):
+        if package_id not in self.server.vault.packages:
+            self._failure("INVALID_DATA", f"Package {package_id} not found.")
+            return
+        job_id = self.server.add_job({"status": "SUCCESS"})
+        self._send(200, {"responseStatus": "SUCCESS", "job_id": job_id})
+
+def _key_values(values, cast=float):
+    """Parses repeated `label=value` (or bare `value` for every endpoint) options."""
+    result = {}
+    for item in values or []:
+        label, _, value = item.rpartition("=")
+        result[label or "*"] = cast(value)
+    return result
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline Vault API simulator for vdx")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument("--components", type=int, default=100, help="Number of MDL components to generate")
+    parser.add_argument("--java-classes", type=int, default=10, help="Number of Java SDK classes to generate")
+    parser.add_argument("--pages", type=int, default=2, help="Number of Custom Page distributions to generate")
+    parser.add_argument("--page-bytes", type=int, default=256 * 1024, help="Approximate size of each distribution")
+    parser.add_argument("--languages", default="en", help="Comma-separated language keys")
+    parser.add_argument("--page-size", type=int, default=DEFAULT_PAGE_SIZE, help="Records per query page")
+    parser.add_argument("--latency", action="append", metavar="[ENDPOINT=]SECONDS", help="Added response latency, repeatable")
+    parser.add_argument("--error-rate", action="append", metavar="[ENDPOINT=]RATE", help="Probability of an injected 429/5xx, repeatable")
+    parser.add_argument("--session-timeout", type=float, help="Idle seconds before a session expires")
+    parser.add_argument("--burst-limit", type=int, default=0, help="Calls allowed per 5 minute window (0 disables limit headers)")
+    parser.add_argument("--job-duration", type=float, default=0.0, help="Seconds before async jobs complete")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--verbose", action="store_true")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.DEBUG if args.verbose else logging.INFO, format='%(message)s')
+    vault = generate_vault(
+        components=args.components, java_classes=args.java_classes, pages=args.pages,
+        page_bytes=args.page_bytes, languages=[l.strip() for l in args.languages.split(",") if l.strip()], seed=args.seed,
+    )
+    server = VaultSimulator(
+        vault, host=args.host, port=args.port, latency=_key_values(args.latency),
+        error_rate=_key_values(args.error_rate), session_timeout=args.session_timeout,
+        page_size=args.page_size, burst_limit=args.burst_limit, job_duration=args.job_duration, seed=args.seed,
+    )
+    logging.info(f"Vault simulator listening on {server.url} ({len(vault.components)} components).")
+    logging.info(f"Log in with: vdx login -v {server.url} -u sim -p sim")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,116 @@
+import os
+import time
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+
+DEFAULT_POOL_SIZE = 10
+
+_session = None
+_session_lock = threading.Lock()
+_pool_size = None
+_keep_alive = None
+
+_stats_lock = threading.Lock()
+_stats = {"requests": 0, "elapsed": 0.0}
+
+def _env_flag(name, default):
+    value = os.getenv(name)
+    if value is None:
+        return default
+    return value.strip().lower() not in ("0", "false", "no", "off")
+
+def configure(pool_size=None, keep_alive=None):
+    """
+    Overrides the pool settings for the shared HTTP session. Falls back to the
+    VDX_POOL_SIZE and VDX_KEEP_ALIVE environment variables when not given.
+    An already-open session is closed and rebuilt on next use.
+    """
+    global _pool_size, _keep_alive, _session
+    with _session_lock:
+        if pool_size is not None:
+            _pool_size = max(1, int(pool_size))
+        if keep_alive is not None:
+            _keep_alive = keep_alive
+        if _session is not None:
+            _session.close()
+            _session = None
+
+def ensure_pool_size(min_size):
+    """Grows the connection pool so that `min_size` concurrent workers never block on it."""
+    if min_size > _current_pool_size():
+        configure(pool_size=min_size)
+
+def _current_pool_size():
+    if _pool_size is not None:
+        return _pool_size
+    return max(1, int(os.getenv("VDX_POOL_SIZE", DEFAULT_POOL_SIZE)))
+
+def get_http_session():
+    """
+    Returns the process-wide pooled requests.Session. Every command shares it so
+    repeated calls to the same Vault DNS reuse open TCP+TLS connections.
+    """
+    global _session
+    with _session_lock:
+        if _session is None:
+            pool_size = _current_pool_size()
+            keep_alive = _keep_alive if _keep_alive is not None else _env_flag("VDX_KEEP_ALIVE", True)
+
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+            session.mount("https://", adapter)
+            session.mount("http://", adapter)
+            if not keep_alive:
+                session.headers["Connection"] = "close"
+            logging.debug(f"[HTTP] Created pooled session (pool size {pool_size}, keep-alive {'on' if keep_alive else 'off'}).")
+            _session = session
+        return _session
+
+def request(method, url, **kwargs):
+    """Sends a request through the pooled session and records timing counters."""
+    session = get_http_session()
+    start = time.perf_counter()
+    try:
+        return session.request(method, url, **kwargs)
+    finally:
+        elapsed = time.perf_counter() - start
+        with _stats_lock:
+            _stats["requests"] += 1
+            _stats["elapsed"] += elapsed
+
+def connection_stats():
+    """
+    Returns request/connection counters for the shared session. `opened` is the
+    number of new connections urllib3 had to establish; every other request
+    was served over a kept-alive connection.
+    """
+    with _stats_lock:
+        stats = dict(_stats)
+
+    opened = 0
+    session = _session
+    if session is not None:
+        # The same adapter is mounted for both schemes; count each pool once.
+        adapters = {id(a): a for a in session.adapters.values()}
+        for adapter in adapters.values():
+            manager = adapter.poolmanager
+            for key in list(manager.pools.keys()):
+                pool = manager.pools.get(key)
+                if pool is not None:
+                    opened += pool.num_connections
+
+    stats["opened"] = opened
+    stats["reused"] = max(0, stats["requests"] - opened)
+    return stats
+
+def log_connection_stats():
+    stats = connection_stats()
+    if not stats["requests"]:
+        return
+    avg_ms = stats["elapsed"] / stats["requests"] * 1000
+    logging.debug(
+        f"[HTTP] {stats['requests']} request(s): {stats['opened']} connection(s) opened, "
+        f"{stats['reused']} reused, {stats['elapsed']:.2f}s total ({avg_ms:.0f}ms avg)."
+    )
@@ -1,11 +1,30 @@
 import hashlib
 import json
 import os
-import fnmatch
+import logging
+import re
+import shutil
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
 from pathlib import Path
+from vdx import profiler, metrics
 
 STATE_FILE = ".vdx_state.json"
+# Append-only log of per-file state updates, folded into STATE_FILE by save_state
+STATE_JOURNAL_FILE = ".vdx_state.journal"
+# Compact the journal into the state file once it holds this many entries
+JOURNAL_COMPACT_THRESHOLD = 5000
 IGNORE_FILE = ".vdxignore"
+# Content-addressed copies of the last pulled/pushed bytes, keyed by MD5
+OBJECT_STORE_DIR = ".vdx_objects"
+# Buffer size for streamed downloads, extraction and hashing
+CHUNK_SIZE = 1024 * 1024
+# Below this many files, process start-up costs more than hashing inline
+PARALLEL_HASH_THRESHOLD = 64
+# Upper bound for ProcessPoolExecutor workers on Windows
+WINDOWS_MAX_WORKERS = 61
 
 def compute_checksum(content):
     if content is None:
@@ -14,28 +33,466 @@ def compute_checksum(content):
         content = content.encode('utf-8')
     return hashlib.md5(content).hexdigest()
 
+def _translate_ignore_pattern(pattern):
+    """
+    Translates one .gitignore-style pattern into a regex source.
+    Returns (regex, negated, dir_only).
+    """
+    negated = pattern.startswith('!')
+    if negated:
+        pattern = pattern[1:]
+    elif pattern.startswith('\\!') or pattern.startswith('\\#'):
+        pattern = pattern[1:]
+
+    dir_only = pattern.endswith('/')
+    pattern = pattern.rstrip('/')
+    # A slash anywhere but the end anchors the pattern to the project root
+    anchored = '/' in pattern
+    pattern = pattern.lstrip('/')
+
+    regex = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        if pattern.startswith('**/', i):
+            regex.append('(?:.*/)?')
+            i += 3
+            continue
+        if pattern.startswith('**', i):
+            regex.append('.*')
+            i += 2
+            continue
+        if c == '*':
+            regex.append('[^/]*')
+        elif c == '?':
+            regex.append('[^/]')
+        elif c == '[':
+            end = pattern.find(']', i + 2 if pattern.startswith('[!', i) else i + 1)
+            if end == -1:
+                regex.append(re.escape(c))
+            else:
+                body = pattern[i + 1:end]
+                if body.startswith('!'):
+                    body = '^' + body[1:]
+                regex.append('[' + body.replace('\\', '\\\\') + ']')
+                i = end
+        elif c == '\\' and i + 1 < n:
+            i += 1
+            regex.append(re.escape(pattern[i]))
+        else:
+            regex.append(re.escape(c))
+        i += 1
+
+    prefix = '' if anchored else '(?:.*/)?'
+    return prefix + ''.join(regex), negated, dir_only
+
+class IgnoreMatcher:
+    """
+    Compiled .vdxignore rules with .gitignore semantics: the last matching pattern
+    wins, `!` re-includes, a leading or inner `/` anchors to the project root, a
+    trailing `/` only matches directories, and nothing below an ignored directory
+    can be re-included. All patterns are folded into one regex per path kind.
+    """
+    def __init__(self, patterns):
+        self.patterns = list(patterns)
+        translated = [_translate_ignore_pattern(p) for p in self.patterns]
+        self._negated = [negated for _, negated, _ in translated]
+        self.has_negations = any(self._negated)
+        self._file_regex = self._compile([(i, t) for i, t in enumerate(translated) if not t[2]])
+        self._dir_regex = self._compile(list(enumerate(translated)))
+        self._dir_cache = {}
+
+    @staticmethod
+    def _compile(indexed):
+        if not indexed:
+            return None
+        # Alternatives are tried in order, so list later patterns first: the first
+        # alternative that fully matches is then the last matching pattern.
+        alternatives = [f"(?P<p{i}>{regex})" for i, (regex, _, _) in reversed(indexed)]
+        return re.compile('|'.join(alternatives), re.DOTALL)
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    def _match_one(self, path, is_dir):
+        regex = self._dir_regex if is_dir else self._file_regex
+        if regex is None:
+            return False
+        m = regex.fullmatch(path)
+        return bool(m) and not self._negated[int(m.lastgroup[1:])]
+
+    def _dir_ignored(self, dir_path):
+        if dir_path not in self._dir_cache:
+            parent = dir_path.rpartition('/')[0]
+            self._dir_cache[dir_path] = (bool(parent) and self._dir_ignored(parent)) or self._match_one(dir_path, True)
+        return self._dir_cache[dir_path]
+
+    def match(self, path, is_dir=False):
+        """True if `path` (relative to the project root) is ignored."""
+        if not self.patterns:
+            return False
+        path = os.path.normpath(path).replace(os.sep, '/').strip('/')
+        parent = path.rpartition('/')[0]
+        if parent and self._dir_ignored(parent):
+            return True
+        return self._dir_ignored(path) if is_dir else self._match_one(path, False)
+
+    def prunes(self, dir_path):
+        """
+        True if nothing under `dir_path` can be un-ignored, so a tree walk may skip it.
+        Besides ignored directories this covers patterns like `components/Report/*`:
+        when a placeholder child name no real file can have is ignored and no `!`
+        rule exists, every child is ignored too.
+        """
+        if not self.patterns:
+            return False
+        if self.match(dir_path, is_dir=True):
+            return True
+        return not self.has_negations and self.match(dir_path.rstrip('/' + os.sep) + '/\0')
+
+    def excluded_component_types(self, component_types):
+        """Component types whose whole components/<type>/ directory is ignored."""
+        return [t for t in component_types if self.prunes(f"components/{t}")]
+
+    def excluded_name_globs(self, component_type, suffix=".mdl"):
+        """
+        Returns `*`-only globs over component names whose components/<type>/<name><suffix>
+        file is always ignored, for filtering server-side. Only patterns that translate
+        exactly are returned, and none at all when a `!` rule could re-include a file.
+        """
+        if self.has_negations:
+            return []
+        globs = []
+        for pattern in self.patterns:
+            if pattern.endswith('/') or pattern.startswith('\\'):
+                continue
+            if '/' in pattern:
+                segments = pattern.lstrip('/').split('/')
+                if len(segments) != 3 or segments[0] != "components" or segments[1] not in (component_type, '*'):
+                    continue
+                name_glob = segments[2]
+            else:
+                name_glob = pattern
+            if any(c in name_glob for c in '?[\\') or '**' in name_glob:
+                continue
+            if name_glob.endswith(suffix):
+                name_glob = name_glob[:-len(suffix)]
+            elif not name_glob.endswith('*'):
+                # Cannot match a file ending in the suffix
+                continue
+            if name_glob and name_glob not in globs:
+                globs.append(name_glob)
+        return globs
+
 def load_ignore_patterns():
+    """Loads and compiles .vdxignore from the current working directory."""
     # We look for .vdxignore in the current working directory where the user runs the command
+    patterns = []
     if os.path.exists(IGNORE_FILE):
         with open(IGNORE_FILE, 'r') as f:
-            return [line.strip() for line in f if line.strip() and not line.startswith('#')]
-    return []
+            patterns = [line.strip() for line in f if line.strip() and not line.startswith('#')]
+    return IgnoreMatcher(patterns)
 
 def is_ignored(file_path, patterns):
-    for pattern in patterns:
-        if fnmatch.fnmatch(file_path, pattern):
-            return True
-    return False
+    if not isinstance(patterns, IgnoreMatcher):
+        patterns = IgnoreMatcher(patterns)
+    return patterns.match(file_path)
+
+class State(dict):
+    """
+    Maps tracked file paths to the MD5 of their last synced content. `stats` holds
+    the [size, mtime_ns, inode] fingerprint each file had when its MD5 was recorded,
+    which lets change detection skip hashing files that have not been touched.
+
+    A State returned by load_state is journaled: record() and forget() append each
+    update to .vdx_state.journal so long-running syncs survive a crash without
+    rewriting the whole state file. save_state() compacts the journal away.
+
+    `written_ns` is when the state was last written to disk. A file whose mtime is
+    at or after it may have been edited within the same timestamp tick as its
+    fingerprint was taken ("racily clean"), so its fingerprint is not trusted.
+    """
+    def __init__(self, checksums=None, stats=None):
+        super().__init__(checksums or {})
+        self.stats = stats if stats is not None else {}
+        # Run-level bookkeeping such as incremental pull high-water marks
+        self.meta = {}
+        self.journaled = False
+        self.journal_entries = 0
+        self.written_ns = None
+
+    def __delitem__(self, path):
+        super().__delitem__(path)
+        self.stats.pop(path, None)
+
+    def record(self, path, checksum, stat=None):
+        """Tracks `path` at `checksum` (and its fingerprint) and journals the update."""
+        self[path] = checksum
+        if stat is not None:
+            self.stats[path] = stat
+        else:
+            self.stats.pop(path, None)
+        self._append_journal({"path": path, "md5": checksum, "stat": stat})
+        metrics.inc("vdx_state_updates_total", op="record")
+
+    def forget(self, path):
+        """Stops tracking `path` and journals the removal."""
+        if path in self:
+            del self[path]
+            self._append_journal({"path": path, "deleted": True})
+            metrics.inc("vdx_state_updates_total", op="forget")
+
+    def _append_journal(self, entry):
+        if not self.journaled:
+            return
+        with open(STATE_JOURNAL_FILE, 'a', encoding='utf-8') as f:
+            f.write(json.dumps(entry, separators=(',', ':')) + "\n")
+        self.journal_entries += 1
+        if self.journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+            save_state(self)
+
+def file_fingerprint(path):
+    st = os.stat(path)
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+def _replay_journal(state):
+    """Applies journaled updates on top of the base state. A torn final line is ignored."""
+    if not os.path.exists(STATE_JOURNAL_FILE):
+        return 0
+    applied = 0
+    with open(STATE_JOURNAL_FILE, 'r', encoding='utf-8') as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except json.JSONDecodeError:
+                logging.debug(f"Ignoring incomplete entry in {STATE_JOURNAL_FILE}.")
+                break
+            path = entry.get("path")
+            if entry.get("deleted"):
+                if path in state:
+                    del state[path]
+            else:
+                state[path] = entry.get("md5")
+                if entry.get("stat") is not None:
+                    state.stats[path] = entry["stat"]
+                else:
+                    state.stats.pop(path, None)
+            applied += 1
+    return applied
 
 def load_state():
+    state = State()
     if os.path.exists(STATE_FILE):
         with open(STATE_FILE, 'r') as f:
-            return json.load(f)
-    return {}
+            data = json.load(f)
+        if "files" in data and data.get("version") == 2:
+            state = State(data["files"], data.get("stats", {}))
+            state.meta = data.get("meta", {})
+        else:
+            # Legacy format: a flat {path: md5} mapping without stat fingerprints
+            state = State(data)
+
+    state.journal_entries = _replay_journal(state)
+    written = [os.stat(path).st_mtime_ns for path in (STATE_FILE, STATE_JOURNAL_FILE) if os.path.exists(path)]
+    state.written_ns = max(written) if written else None
+    state.journaled = True
+    if state.journal_entries >= JOURNAL_COMPACT_THRESHOLD:
+        save_state(state)
+    return state
 
 def save_state(state):
-    with open(STATE_FILE, 'w') as f:
-        json.dump(state, f, indent=4)
+    """Atomically writes the full state in compact form and discards the journal."""
+    stats = getattr(state, "stats", {})
+    # Write to a temp file and rename so an interrupted write never corrupts the state
+    tmp_path = f"{STATE_FILE}.tmp"
+    with open(tmp_path, 'w') as f:
+        # Files modified in the same tick as this write could still change unnoticed,
+        # so their fingerprints are dropped and they are rehashed on the next scan
+        written_ns = os.fstat(f.fileno()).st_mtime_ns
+        data = {
+            "version": 2,
+            "files": dict(state),
+            "stats": {path: stats[path] for path in state if path in stats and stats[path][1] < written_ns},
+            "meta": getattr(state, "meta", {}),
+        }
+        json.dump(data, f, separators=(',', ':'))
+        f.flush()
+        os.fsync(f.fileno())
+    os.replace(tmp_path, STATE_FILE)
+
+    # Everything in the journal is now part of the base file
+    if os.path.exists(STATE_JOURNAL_FILE):
+        os.remove(STATE_JOURNAL_FILE)
+    if isinstance(state, State):
+        state.journal_entries = 0
+        state.written_ns = written_ns
+        for path in [path for path, stat in stats.items() if stat[1] >= written_ns]:
+            del stats[path]
+
+def compute_file_checksum(path):
+    """MD5 of a file, read in CHUNK_SIZE buffers so large files are never fully loaded."""
+    md5 = hashlib.md5()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+            md5.update(chunk)
+    return md5.hexdigest()
+
+def hash_files(paths, total_bytes=None):
+    """
+    Returns the checksums of `paths` in order. Large batches are spread across a
+    process pool (VDX_HASH_WORKERS, default one per core); small ones are hashed inline.
+    """
+    workers = int(os.getenv("VDX_HASH_WORKERS", os.cpu_count() or 1))
+    if os.name == "nt":
+        workers = min(workers, WINDOWS_MAX_WORKERS)
+    start = time.perf_counter()
+    trace_start = profiler.timestamp_us()
+    checksums = None
+    if workers > 1 and len(paths) >= PARALLEL_HASH_THRESHOLD:
+        try:
+            with ProcessPoolExecutor(max_workers=workers) as pool:
+                chunksize = max(1, len(paths) // (workers * 4))
+                checksums = list(pool.map(compute_file_checksum, paths, chunksize=chunksize))
+        except (OSError, ValueError, BrokenProcessPool) as e:
+            logging.debug(f"Parallel hashing unavailable ({e}); hashing serially.")
+    parallel = checksums is not None
+    if checksums is None:
+        with profiler.cpu_profile():
+            checksums = [compute_file_checksum(path) for path in paths]
+
+    elapsed = time.perf_counter() - start
+    profiler.add_span("hash files", "cpu", trace_start, elapsed * 1_000_000, files=len(paths), bytes=total_bytes, parallel=parallel)
+    if paths and total_bytes is not None and logging.getLogger().isEnabledFor(logging.DEBUG):
+        megabytes = total_bytes / (1024 * 1024)
+        rate = megabytes / elapsed if elapsed > 0 else 0.0
+        logging.debug(f"Hashed {len(paths)} file(s), {megabytes:.1f} MB in {elapsed:.2f}s ({rate:.1f} MB/s).")
+    return checksums
+
+def scan_files(directories, state, ignore_patterns=None, suffix=None, verify=False):
+    """
+    Computes the current checksum of every file under `directories`.
+    Files whose size, mtime and inode match the fingerprint recorded in `state`
+    reuse the recorded checksum instead of being re-read, unless the file is racily
+    clean (see State); `verify` forces a full rehash.
+    Returns a State of the local files.
+    """
+    trace_start = profiler.timestamp_us()
+    local_files = State()
+    state_stats = getattr(state, "stats", {})
+    # Fingerprints can only be trusted for files last modified before the state was written
+    written_ns = getattr(state, "written_ns", None)
+    if ignore_patterns and not isinstance(ignore_patterns, IgnoreMatcher):
+        ignore_patterns = IgnoreMatcher(ignore_patterns)
+    to_hash = []
+    for directory in directories:
+        if not os.path.exists(directory):
+            continue
+        for root, dirs, files in os.walk(directory):
+            if ignore_patterns:
+                # Never descend into wholly ignored subtrees
+                dirs[:] = [d for d in dirs if not ignore_patterns.prunes(os.path.join(root, d))]
+            for file in files:
+                if suffix and not file.endswith(suffix):
+                    continue
+                path = os.path.join(root, file)
+                if ignore_patterns and is_ignored(path, ignore_patterns):
+                    continue
+
+                fingerprint = file_fingerprint(path)
+                local_files.stats[path] = fingerprint
+                trusted = written_ns is not None and fingerprint[1] < written_ns
+                if not verify and trusted and path in state and state_stats.get(path) == fingerprint:
+                    local_files[path] = state[path]
+                else:
+                    # Placeholder keeps walk order; filled in once hashing completes
+                    local_files[path] = None
+                    to_hash.append(path)
+
+    total_bytes = sum(local_files.stats[path][0] for path in to_hash)
+    for path, checksum in zip(to_hash, hash_files(to_hash, total_bytes)):
+        local_files[path] = checksum
+
+    metrics.inc("vdx_files_hashed_total", len(to_hash))
+    metrics.inc("vdx_files_hash_skipped_total", len(local_files) - len(to_hash))
+    logging.debug(f"Scanned {len(local_files)} file(s): {len(to_hash)} hashed, {len(local_files) - len(to_hash)} unchanged by stat.")
+    profiler.add_span("scan files", "phase", trace_start, profiler.timestamp_us() - trace_start,
+                      directories=list(directories), files=len(local_files), hashed=len(to_hash))
+    return local_files
+
+def _object_path(checksum):
+    return os.path.join(OBJECT_STORE_DIR, checksum[:2], checksum[2:])
+
+def has_object(checksum):
+    return bool(checksum) and os.path.exists(_object_path(checksum))
+
+def _publish_object(checksum, write):
+    """
+    Writes an object through a temp file so readers never see a partial object.
+    `write` may return False to discard the object instead.
+    """
+    path = _object_path(checksum)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as tmp:
+        keep = write(tmp) is not False
+    if keep:
+        os.replace(tmp.name, path)
+    else:
+        os.remove(tmp.name)
+    return keep
+
+def store_object(content, checksum=None):
+    """Saves `content` (str or bytes) in the object store under its MD5."""
+    if isinstance(content, str):
+        content = content.encode('utf-8')
+    checksum = checksum or compute_checksum(content)
+    if not has_object(checksum):
+        _publish_object(checksum, lambda f: f.write(content))
+    return checksum
+
+def store_object_file(file_path, checksum):
+    """
+    Copies an on-disk file expected to have MD5 `checksum` into the object store,
+    hashing the bytes as they are copied. Returns False, storing nothing, if the
+    file no longer matches (e.g. it was edited after it was scanned).
+    """
+    def copy(dst):
+        md5 = hashlib.md5()
+        with open(file_path, 'rb') as src:
+            for chunk in iter(lambda: src.read(CHUNK_SIZE), b""):
+                md5.update(chunk)
+                dst.write(chunk)
+        return md5.hexdigest() == checksum
+
+    if has_object(checksum):
+        # Already stored; only confirm the file still has that content
+        return compute_file_checksum(file_path) == checksum
+    return _publish_object(checksum, copy)
+
+def load_object(checksum):
+    """Returns the stored bytes for `checksum`, or None if it is not in the store."""
+    if not checksum:
+        return None
+    try:
+        with open(_object_path(checksum), 'rb') as f:
+            return f.read()
+    except OSError:
+        return None
+
+def prune_objects(state):
+    """Removes stored objects that no tracked file refers to any more."""
+    if not os.path.isdir(OBJECT_STORE_DIR):
+        return
+    referenced = set(state.values())
+    for prefix in os.listdir(OBJECT_STORE_DIR):
+        prefix_dir = os.path.join(OBJECT_STORE_DIR, prefix)
+        if not os.path.isdir(prefix_dir):
+            continue
+        for name in os.listdir(prefix_dir):
+            if prefix + name not in referenced:
+                try:
+                    os.remove(os.path.join(prefix_dir, name))
+                except OSError:
+                    pass
 
 def load_dotenv(filepath=".env"):
     # Check current directory for .env